@@ -1,10 +1,23 @@
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
-from OpenGL.GLUT import GLUT_BITMAP_HELVETICA_18
-
+import argparse
+import math
+import sys
 import time
-import random
+from typing import TYPE_CHECKING
+
+_import_start = time.perf_counter()
+
+if TYPE_CHECKING:  # at run time load_gl() imports these when the window is created
+    from OpenGL.GL import *
+    from OpenGL.GLU import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLUT import GLUT_BITMAP_HELVETICA_18
+
+from frustum import Frustum
+from game_state import FixedStepper, GameState, lane_x, LANE_OFFSET, NUM_LANES, CRASH_DURATION, SIM_HZ, SPAWNERS
+from mesh import column_major, look_at, mat_mul, perspective, record_mesh, rotation, scaling
+from profiler import FrameProfiler
+from replay import Recording
+from scheduler import FrameClock, FrameScheduler
 
 
 # Global constants/state
@@ -12,81 +25,134 @@ WINDOW_W, WINDOW_H = 1000, 800
 
 # Camera
 fovY = 70
+Z_NEAR, Z_FAR = 0.1, 5000.0
 camera_mode_third = True
 
+# GL_LIGHT0, in eye space; the core renderer's shader uses the same values
+LIGHT_POSITION = (0.0, 300.0, 200.0)
+LIGHT_DIFFUSE = (0.9, 0.9, 0.9)
+LIGHT_AMBIENT = (0.2, 0.2, 0.25)
+LIGHT_MODEL_AMBIENT = (0.2, 0.2, 0.2)  # GL's default global ambient
+
+# Renderer backend, picked with --renderer: "fixed" draws with fixed-function
+# GL and display lists, "core" with core-profile shaders (core_renderer.py).
+# HUD text goes through the glyph atlas either way.
+RENDERER = "fixed"
+core = None
+
+# Frustum culling: setupCamera() rebuilds the planes, draw code tests against them
+USE_CULLING = True
+frustum = Frustum()
+
 # World / road
-LANE_OFFSET = 150  # increased for more space between lanes
-NUM_LANES = 3
 SEGMENT_LENGTH = 600
 NUM_SEGMENTS = 15
 LANE_MARKING_LENGTH = 50
 LANE_MARKING_GAP = 40
-
-# Player
-player_lane = 1  # target lane: 0,1,2
-player_z = 0.0
-player_x = 0.0   # smooth position along X
-
-BASE_SPEED = 5.0
-player_speed = BASE_SPEED
-
-# Smooth lane movement (Feature 2.1)
-LANE_LERP_SPEED = 10.0  # bigger = snappier, smaller = smoother
-
-# Feature-7: difficulty/speed progression
-SPEED_RAMP_PER_SEC = 0.025
-SPEED_RAMP_PER_100_POINTS = 0.3  # speed increase per 100 points
-MAX_BASE_SPEED = 20.0  # increased max speed
-BOOST_ADD = 1.8
-is_boosting = False
-
-# Feature-8: pause
-is_paused = False
-
-# Feature-8: power-up (Shield)
-shield_active = False
-shield_timer = 0.0
-SHIELD_DURATION = 8.0
-
-# Feature-7: bonus for destroying enemy vehicles
-ENEMY_DESTROY_BONUS = 50
-
-# Feature-4: crash visual effect
-CRASH_DURATION = 0.6
-crash_timer = 0.0
-
-# Score / state
-collect_score = 0
-distance_score = 0
-total_score = 0
-game_over = False
-
-# Obstacles / traffic
-# kind: "car", "cube", "barrier", "shield"
-obstacles = []  # each: {"lane": int, "z": float, "kind": str}
-spawn_timer = 0.0
-spawn_interval = 0.8
-start_time = time.time()
-
-# Time
-_last_time = time.time()
-
-# Cheat mode - Gun
-cheat_mode = False
-bullets = []  # each: {"x": float, "z": float}
-BULLET_SPEED = 25.0
-SHOOT_INTERVAL = 0.15
-shoot_timer = 0.0
+USE_ROAD_STREAMER = True  # keep segments in a VBO ring buffer (road.py)
+road_streamer = None
+
+# Backdrop (grass, mountains) relative to the player, see backdrop_shape()
+SKY_COLOR = (0.5, 0.8, 1.0, 1.0)
+GRASS_Y = -6.0
+GRASS_BEHIND = 2500
+HORIZON_DISTANCE = 4000  # grass far edge, where the mountains stand
+MOUNTAIN_COUNT = 30
+MOUNTAIN_SPAN = (-2800, 2710)  # x of the first and last peak
+
+# Simulation (player, obstacles, scores, cheat gun) lives in game_state.py
+SPAWNER = "timer"  # or "track": obstacles from a seeded, pregenerated track (track.py)
+TRACK_THREAD = True  # generate track chunks on a background thread
+state = GameState()
+stepper = FixedStepper(state, SIM_HZ)  # input callbacks queue into stepper.pending
+
+# Interpolated positions for the frame being drawn (see GameState.interpolate)
+view_x, view_z = state.player_x, state.player_z
+obstacle_shift = 0.0
+bullet_shift = 0.0
+
+# HUD text from a pre-rendered glyph atlas (hud.py)
+USE_HUD_ATLAS = True
+hud = None
+
+# Frame profiler: per-phase timings, overlay toggled with F, CSV written on exit
+PROFILE_PHASES = ("sim", "camera", "environment", "obstacles", "player", "hud", "swap")
+PROFILE_CSV = "frame_profile.csv"
+PROFILE_OVERLAY_REFRESH = 0.5  # seconds between overlay text updates
+profiler = FrameProfiler(PROFILE_PHASES)
+show_profile = False
+_profile_lines = []
+_profile_updated = 0.0
+
+# Replay: --record FILE saves the run on exit, --replay FILE plays one back
+recording = None
+replaying = False
+
+# Frame capture: --capture DIR writes every presented frame as a PNG
+# (frame_capture.py); offscreen.py renders without a window
+capture = None
+
+# Frame pacing: a glutTimerFunc chain at TARGET_FPS, IDLE_FPS on static
+# screens (paused, game over), stopped while the window is hidden
+TARGET_FPS = 60  # 0 = uncapped, redraw from glutIdleFunc
+IDLE_FPS = 4
+scheduler = FrameScheduler(TARGET_FPS, IDLE_FPS)
+window_visible = True
+_timer_token = 0  # only the newest timer chain keeps running
+
+# Redraw skipping: a static screen is only redrawn when its frame_key()
+# changes; otherwise the last frame stays on screen
+USE_REDRAW_SKIP = True
+_drawn_key = None
+skipped_redraws = 0
+
+# Startup: OpenGL is imported by load_gl() and GPU resources are built on
+# first use (LAZY_BUILD); the stage times are printed after the first frame
+LAZY_BUILD = True
+STARTUP_REPORT = True
+_startup = {}  # stage -> seconds
+_startup_mark = None  # when main() finished creating the window
+_built = set()  # build_* functions already run
+
+# Game time for animation and simulation: sampled once per frame,
+# [ / ] halve / double its speed, backslash freezes it
+clock = FrameClock()
+TIME_SCALE_LIMITS = (1.0 / 16, 16.0)
 
 
 # Utility
-def lane_x(idx):
-    """Mirror lanes so lower index is visually left when camera is behind car."""
-    center = 0.0
-    return center - (idx - 1) * LANE_OFFSET
-
-
-def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
+def load_gl():
+    """Put the OpenGL, GLU and GLUT names into this module, as star imports would."""
+    if "glBegin" in globals():
+        return
+    t0 = time.perf_counter()
+    import OpenGL.GL
+    import OpenGL.GLU
+    import OpenGL.GLUT
+    names = globals()
+    for module in (OpenGL.GL, OpenGL.GLU, OpenGL.GLUT):
+        for name, value in vars(module).items():
+            if not name.startswith("_") and name not in names:
+                names[name] = value
+    _startup["opengl"] = time.perf_counter() - t0
+
+
+def build_once(builder):
+    """Run a build_* function the first time its resource is needed."""
+    if builder not in _built:
+        _built.add(builder)
+        builder()
+
+
+def report_startup():
+    _startup["total"] = time.perf_counter() - _import_start
+    print("Startup ms: " + "  ".join("{} {:.0f}".format(stage, seconds * 1000.0)
+                                     for stage, seconds in _startup.items()), file=sys.stderr)
+
+
+def draw_text(x, y, text, font=None):
+    if font is None:
+        font = GLUT_BITMAP_HELVETICA_18
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
     glLoadIdentity()
@@ -107,27 +173,40 @@ def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
     glMatrixMode(GL_MODELVIEW)
 
 
-def has_collided(x1, z1, w1, h1, x2, z2, w2, h2):
-    return (
-        x1 - w1 < x2 + w2 and
-        x1 + w1 > x2 - w2 and
-        z1 - h1 < z2 + h2 and
-        z1 + h1 > z2 - h2
-    )
+def show_text(key, x, y, fmt, *values):
+    """HUD text: batched through the glyph atlas when available, else draw_text()."""
+    build_once(build_hud)
+    if hud:
+        hud.show(key, x, y, fmt, *values)
+    else:
+        draw_text(x, y, fmt.format(*values) if values else fmt)
+
+
+def build_hud():
+    global hud
+    if not USE_HUD_ATLAS or not glGenFramebuffers:
+        return
+    from hud import GlyphAtlas, HudText
+    try:
+        hud = HudText(GlyphAtlas(GLUT_BITMAP_HELVETICA_18))
+    except (GLError, RuntimeError):
+        hud = None
 
 
 def draw_crash_flash():
-    global crash_timer
-    if crash_timer <= 0.0:
+    if state.crash_timer <= 0.0:
         return
 
-    t = crash_timer / CRASH_DURATION
+    t = state.crash_timer / CRASH_DURATION
     if t < 0.0:
         t = 0.0
     if t > 1.0:
         t = 1.0
 
     alpha = 0.6 * t
+    if core:
+        core.flash(1.0, 0.2, 0.0, alpha)
+        return
 
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
@@ -164,45 +243,29 @@ def draw_crash_flash():
 
 
 def restart_game():
-    global player_lane, player_z, player_speed, is_boosting
-    global collect_score, distance_score, total_score, game_over
-    global obstacles, spawn_timer, spawn_interval, start_time
-    global _last_time, is_paused
-    global shield_active, shield_timer
-    global player_x
-    global crash_timer
+    stepper.reset()
+    stepper.pending.append("restart")  # goes through the stepper so recordings see it
+    clock.resync()
 
-    player_lane = 1
-    player_z = 0.0
-    player_speed = BASE_SPEED
-    is_boosting = False
 
-    player_x = lane_x(player_lane)
+def start_replay(run):
+    """Play back a Recording from its first tick."""
+    global recording, replaying
+    recording = run
+    new_game(run.seed, run.hz, run.spawner)
+    stepper.playback = run.inputs_by_tick()
+    stepper.max_ticks = run.ticks
+    replaying = True
 
-    collect_score = 0
-    distance_score = 0
-    total_score = 0
-    game_over = False
 
-    obstacles = []
-    spawn_timer = 0.0
-    spawn_interval = 0.8
-    start_time = time.time()
-
-    is_paused = False
-
-    shield_active = False
-    shield_timer = 0.0
-
-    crash_timer = 0.0
-
-    _last_time = time.time()
-    
-    # Reset cheat mode
-    global cheat_mode, bullets, shoot_timer
-    cheat_mode = False
-    bullets = []
-    shoot_timer = 0.0
+def new_game(seed, hz=SIM_HZ, spawner=None):
+    """Replace the simulation with a fresh, seeded one (for recording / replay)."""
+    global state, stepper, view_x, view_z
+    if state.track is not None:
+        state.track.close()
+    state = GameState(seed, spawner=spawner or SPAWNER, track_thread=TRACK_THREAD)
+    stepper = FixedStepper(state, hz)
+    view_x, view_z = state.player_x, state.player_z
 
 
 # Car / obstacle models
@@ -409,29 +472,82 @@ def draw_enemy_car():
     glPopMatrix()
 
 
-def draw_collectible_cube():
+def draw_enemy_car_mid():
+    """Enemy car for the middle LOD tier: hull and plain wheels only."""
+    glColor3f(0.9, 0.15, 0.15)
     glPushMatrix()
-    glDisable(GL_LIGHTING)
-    
-    # Animation based on time
-    t = time.time()
+    glScalef(2.0, 0.32, 3.6)
+    glutSolidCube(20)
+    glPopMatrix()
+
+    glPushMatrix()
+    glColor3f(0.75, 0.08, 0.1)
+    glTranslatef(0, 8.5, -4)
+    glScalef(1.35, 0.35, 1.35)
+    glutSolidCube(20)
+    glPopMatrix()
+
+    glColor3f(0.12, 0.12, 0.12)
+    for wx, wz in ((17, -24), (-17, -24), (17, 18), (-17, 18)):
+        glPushMatrix()
+        glTranslatef(wx, -5, wz)
+        glScalef(0.48, 0.48, 0.28)
+        glutSolidCube(20)
+        glPopMatrix()
+
+
+def draw_enemy_car_far():
+    """Enemy car for the far LOD tier: one box."""
+    glColor3f(0.85, 0.13, 0.13)
+    glPushMatrix()
+    glTranslatef(0, 1.5, 1)
+    glScalef(2.1, 0.75, 3.7)
+    glutSolidCube(20)
+    glPopMatrix()
+
+
+def collectible_cube_matrix(t):
+    """Spin and pulse of the coin cube at time t."""
     rotation_angle = (t * 100) % 360  # continuous rotation
     pulse = 1.0 + 0.15 * abs(((t * 2) % 2) - 1)  # pulsing effect
-    
+
+    m = rotation(rotation_angle, 0, 1, 0)  # rotate around Y axis
+    m = mat_mul(m, rotation(rotation_angle * 0.7, 1, 0, 0))  # rotate around X axis
+    return mat_mul(m, scaling(pulse, pulse, pulse))  # pulsing scale
+
+
+def draw_collectible_cube(tier=0):
+    name = OBSTACLE_LODS["cube"][tier]
+    if tier >= LOD_STATIC_TIER:
+        draw_model(name)
+        return
+    glPushMatrix()
+    glMultMatrixf(pickup_matrices["cube"])
+    draw_model(name)
+    glPopMatrix()
+
+
+def collectible_cube_shape():
+    glDisable(GL_LIGHTING)
+
     # Yellow/gold coin cube - rotating and pulsing
     glColor3f(1.0, 0.85, 0.0)
-    glRotatef(rotation_angle, 0, 1, 0)  # rotate around Y axis
-    glRotatef(rotation_angle * 0.7, 1, 0, 0)  # rotate around X axis
-    glScalef(pulse, pulse, pulse)  # pulsing scale
     glutSolidCube(14)
-    
+
     # Wireframe outline for sparkle effect
     glColor3f(1.0, 0.95, 0.3)
     glLineWidth(2.0)
     glutWireCube(15)
-    
+
+    glEnable(GL_LIGHTING)
+
+
+def collectible_cube_solid_shape():
+    """Coin cube without the outline, for the lower LOD tiers."""
+    glDisable(GL_LIGHTING)
+    glColor3f(1.0, 0.85, 0.0)
+    glutSolidCube(14)
     glEnable(GL_LIGHTING)
-    glPopMatrix()
 
 
 def draw_barrier():
@@ -462,41 +578,73 @@ def draw_barrier():
     glPopMatrix()
 
 
-def draw_shield_powerup():
-    glPushMatrix()
+def draw_barrier_far():
+    """Barrier for the far LOD tier: one box in the blended stripe colour."""
     glDisable(GL_LIGHTING)
-    
-    # Animation based on time
-    t = time.time()
+    glColor3f(0.95, 0.55, 0.55)
+    glPushMatrix()
+    glScalef(3.0, 0.8, 0.6)
+    glutSolidCube(20)
+    glPopMatrix()
+    glEnable(GL_LIGHTING)
+
+
+def shield_powerup_matrix(t):
+    """Spin and pulse of the shield pickup at time t."""
     rotation_angle = (t * 80) % 360  # continuous rotation
     pulse = 1.0 + 0.2 * abs(((t * 1.5) % 2) - 1)  # pulsing effect
-    
+
+    m = rotation(rotation_angle, 0, 1, 0)  # rotate around Y axis
+    m = mat_mul(m, rotation(rotation_angle * 0.5, 1, 0, 1))  # diagonal rotation
+    return mat_mul(m, scaling(pulse, pulse, pulse))  # pulsing scale
+
+
+def draw_shield_powerup(tier=0):
+    name = OBSTACLE_LODS["shield"][tier]
+    if tier >= LOD_STATIC_TIER:
+        draw_model(name)
+        return
+    glPushMatrix()
+    glMultMatrixf(pickup_matrices["shield"])
+    draw_model(name)
+    glPopMatrix()
+
+
+def shield_powerup_shape():
+    glPushMatrix()
+    glDisable(GL_LIGHTING)
+
     # Blue shield cube - rotating and pulsing
     glColor3f(0.2, 0.7, 1.0)
-    glRotatef(rotation_angle, 0, 1, 0)  # rotate around Y axis
-    glRotatef(rotation_angle * 0.5, 1, 0, 1)  # diagonal rotation
-    glScalef(pulse, pulse, pulse)  # pulsing scale
     glutSolidCube(16)
-    
+
     # Outer wireframe layers for shield effect
     glColor3f(0.4, 0.85, 1.0)
     glLineWidth(2.5)
     glutWireCube(18)
-    
+
     # Second wireframe layer
     glColor3f(0.6, 0.95, 1.0)
     glRotatef(45, 0, 0, 1)  # rotate second layer differently
     glLineWidth(2.0)
     glutWireCube(20)
-    
+
     # Inner glowing core
     glColor3f(0.8, 1.0, 1.0)
     glutSolidCube(10)
-    
+
     glEnable(GL_LIGHTING)
     glPopMatrix()
 
 
+def shield_powerup_solid_shape():
+    """Shield cube without the wire layers and core, for the lower LOD tiers."""
+    glDisable(GL_LIGHTING)
+    glColor3f(0.2, 0.7, 1.0)
+    glutSolidCube(16)
+    glEnable(GL_LIGHTING)
+
+
 # Road / environment
 def draw_road_segment(z_start):
     road_width = LANE_OFFSET * (NUM_LANES + 1)
@@ -551,175 +699,121 @@ def draw_road_segment(z_start):
             pz -= post_gap
 
 
-def draw_environment():
-    glClearColor(0.5, 0.8, 1.0, 1.0)
+def road_segment_bounds(z_start):
+    """Box around draw_road_segment(z_start), rails included."""
+    half_w = LANE_OFFSET * (NUM_LANES + 1) / 2 + 15
+    return (-half_w, 0.0, z_start - SEGMENT_LENGTH - 5), (half_w, 30.0, z_start + 5)
 
-    glDepthMask(GL_FALSE)
-    glDisable(GL_LIGHTING)
 
-    # Draw grass ground first - extends to horizon
-    glColor3f(0.1, 0.5, 0.1)
-    gy = -6.0
-    z_far = player_z + 4000  # extend grass all the way to mountains
-    z_near = player_z - 2500
+def draw_environment():
+    # Grass and mountains only move with the player: one baked, unlit model
+    glDepthMask(GL_FALSE)
+    glPushMatrix()
+    glTranslatef(0, 0, view_z)
+    draw_model("backdrop")
+    glPopMatrix()
+    glDepthMask(GL_TRUE)
 
-    glBegin(GL_QUADS)
-    glVertex3f(-3000, gy, z_far)
-    glVertex3f(3000, gy, z_far)
-    glVertex3f(3000, gy, z_near)
-    glVertex3f(-3000, gy, z_near)
-    glEnd()
+    build_once(build_road_streamer)
+    if road_streamer:
+        road_streamer.draw(view_z, frustum)
+        return
 
-    # Draw distant mountains ON TOP of grass at the far edge
-    # Mountains at same Z as grass far edge so they sit right on it
-    mountain_base_z = z_far
-    mountain_base_y = gy  # exactly same Y as grass
-    
-    # Draw overlapping mountains to cover full width
-    for i in range(30):
-        x_pos = -2800 + i * 190  # spread across full view
-        height = 120 + ((i * 37) % 80)  # increased heights
-        width = 240  # wide base for overlap
-        
-        # Mountain body - darker to blend with distance
-        glColor3f(0.18, 0.28, 0.22)
-        glBegin(GL_TRIANGLES)
-        # Triangle base sits exactly on grass level at grass far edge
-        glVertex3f(x_pos - width, mountain_base_y, mountain_base_z)
-        glVertex3f(x_pos, mountain_base_y + height, mountain_base_z)
-        glVertex3f(x_pos + width, mountain_base_y, mountain_base_z)
-        glEnd()
+    for z in visible_segments():
+        draw_road_segment(z)
 
-    glEnable(GL_LIGHTING)
-    glDepthMask(GL_TRUE)
 
-    first_seg_index = int(player_z // SEGMENT_LENGTH)
+def visible_segments():
+    """z_start of each road segment around the player inside the frustum."""
+    first_seg_index = int(view_z // SEGMENT_LENGTH)
     first_z = first_seg_index * SEGMENT_LENGTH
-    last_z = player_z + SEGMENT_LENGTH * (NUM_SEGMENTS - 1)
+    last_z = view_z + SEGMENT_LENGTH * (NUM_SEGMENTS - 1)
 
+    segments = []
     z = first_z
     while z <= last_z:
-        draw_road_segment(z)
+        if frustum.test_box("segment", *road_segment_bounds(z)):
+            segments.append(z)
         z += SEGMENT_LENGTH
+    return segments
 
 
-# Obstacles / traffic
-def spawn_obstacle():
-    global spawn_interval
-    
-    # Don't spawn if there's already an obstacle too close in any lane
-    min_distance_between = 400  # minimum Z distance between consecutive obstacles
-    
-    # Check if we can spawn
-    can_spawn = True
-    z_spawn = player_z + 800
-    
-    for o in obstacles:
-        if abs(o["z"] - z_spawn) < min_distance_between:
-            can_spawn = False
-            break
-    
-    if not can_spawn:
-        return
-    
-    # Equal probability for all lanes
-    lane = random.randint(0, NUM_LANES - 1)
-
-    r = random.random()
-    if r < 0.12:
-        kind = "cube"
-    elif r < 0.16:
-        kind = "shield"
-    else:
-        kind = random.choice(["car", "barrier"])
-
-    z = player_z + 800
-    obstacles.append({"lane": lane, "z": z, "kind": kind})
-
-    elapsed = time.time() - start_time
-    spawn_interval = max(0.35, 1.0 - elapsed * 0.02)  # reduced spawn delay
-
-
-def update_obstacles(dt):
-    global obstacles, spawn_timer, collect_score, game_over
-    global shield_active, shield_timer
-    global crash_timer
-
-    if game_over or is_paused:
+def build_road_streamer():
+    """Pre-build the road ring buffer; without VBOs the per-segment path stays."""
+    global road_streamer
+    if not USE_ROAD_STREAMER or not glGenBuffers:
         return
+    from road import RoadStreamer
+    try:
+        road_streamer = RoadStreamer(draw_road_segment, SEGMENT_LENGTH, NUM_SEGMENTS)
+    except GLError:
+        road_streamer = None
 
-    for o in obstacles:
-        o["z"] -= player_speed * 60 * dt
 
-    px = player_x
-    pz = player_z
-    pw = 20  # reduced for tighter player hitbox
-    ph = 35  # reduced for tighter player hitbox
-
-    new_obs = []
-    for o in obstacles:
-        if o["z"] <= player_z - 150:
+# Obstacles / traffic
+def draw_obstacle(kind, tier=0):
+    if kind == "cube":
+        draw_collectible_cube(tier)
+    elif kind == "shield":
+        draw_shield_powerup(tier)
+    else:
+        draw_model(OBSTACLE_LODS[kind][tier])
+
+
+def lod_tier(distance):
+    """Index of the first LOD_DISTANCES threshold beyond distance (0 = full detail)."""
+    for tier, limit in enumerate(LOD_DISTANCES):
+        if distance < limit:
+            return tier
+    return len(LOD_DISTANCES)
+
+
+def update_pickup_matrices(t):
+    """Animation matrices for this frame, shared by every pickup of a kind."""
+    pickup_matrices["cube"] = column_major(collectible_cube_matrix(t))
+    pickup_matrices["shield"] = column_major(shield_powerup_matrix(t))
+
+
+def visible_obstacles():
+    """{(kind, LOD tier): [(x, z), ...]} of the obstacles inside the frustum."""
+    build_once(build_cull_bounds)
+    groups = {}
+    test = frustum.test_sphere
+    for tier in range(len(lod_counts)):
+        lod_counts[tier] = 0
+    for lane, z, kind in state.obstacles.items():
+        x = lane_x(lane)
+        z += obstacle_shift
+        if not test("obstacle", x, 10, z, obstacle_radius.get(kind, DEFAULT_CULL_RADIUS)):
             continue
-
-        ox = lane_x(o["lane"])
-        oz = o["z"]
-
-        if o["kind"] == "cube":
-            if has_collided(px, pz, 12, 25, ox, oz, 8, 8):  # tighter collection box
-                collect_score += 10
-                continue
-
-        elif o["kind"] == "shield":
-            if has_collided(px, pz, 12, 25, ox, oz, 10, 10):  # tighter collection box
-                shield_active = True
-                shield_timer = SHIELD_DURATION
-                continue
-
-        else:
-            # Skip collision damage in cheat mode
-            if cheat_mode:
-                new_obs.append(o)
-                continue
-                
-            if has_collided(px, pz, pw, ph, ox, oz, 22, 35):  # reduced obstacle hitbox
-                if shield_active:
-                    shield_active = False
-                    shield_timer = 0.0
-                    collect_score += ENEMY_DESTROY_BONUS
-                    continue
-                else:
-                    game_over = True
-                    crash_timer = CRASH_DURATION
-                    new_obs.append(o)
-                    break
-
-        new_obs.append(o)
-
-    obstacles = new_obs
-
-    if game_over:
-        return
-
-    spawn_timer += dt
-    if spawn_timer >= spawn_interval:
-        spawn_timer = 0.0
-        spawn_obstacle()
+        tier = lod_tier(abs(z - view_z)) if USE_LOD else 0
+        lod_counts[tier] += 1
+        group = groups.get((kind, tier))
+        if group is None:
+            group = groups[(kind, tier)] = []
+        group.append((x, z))
+    return groups
 
 
 def draw_obstacles():
-    for o in obstacles:
-        x = lane_x(o["lane"])
-        glPushMatrix()
-        glTranslatef(x, 10, o["z"])
-        if o["kind"] == "car":
-            draw_enemy_car()
-        elif o["kind"] == "cube":
-            draw_collectible_cube()
-        elif o["kind"] == "shield":
-            draw_shield_powerup()
-        else:
-            draw_barrier()
-        glPopMatrix()
+    # One instanced draw per kind and LOD tier when batches are available
+    build_once(build_obstacle_batches)
+    update_pickup_matrices(clock.now)
+    for (kind, tier), group in visible_obstacles().items():
+        batch = _obstacle_batches.get(OBSTACLE_LODS[kind][tier])
+        if batch:
+            offsets = []
+            for x, z in group:
+                offsets.extend((x, 10, z))
+            batch.set_instances(offsets)
+            batch.draw(pickup_matrices.get(kind) if tier < LOD_STATIC_TIER else None)
+            continue
+
+        for x, z in group:
+            glPushMatrix()
+            glTranslatef(x, 10, z)
+            draw_obstacle(kind, tier)
+            glPopMatrix()
 
 
 # Cheat Mode - Gun & Bullets
@@ -751,17 +845,67 @@ def draw_gun():
 def draw_bullet(x, z):
     """Draw a single bullet"""
     glPushMatrix()
-    glDisable(GL_LIGHTING)
-    
     glTranslatef(x, 15, z)
-    
+    draw_model("bullet")
+    glPopMatrix()
+
+
+def backdrop_shape():
+    """Grass plane reaching the horizon and the mountain row standing on
+    its far edge, around z = 0."""
+    gy = GRASS_Y
+    z_far = HORIZON_DISTANCE
+    z_near = -GRASS_BEHIND
+    glDisable(GL_LIGHTING)
+
+    glColor3f(0.1, 0.5, 0.1)
+    glBegin(GL_QUADS)
+    glVertex3f(-3000, gy, z_far)
+    glVertex3f(3000, gy, z_far)
+    glVertex3f(3000, gy, z_near)
+    glVertex3f(-3000, gy, z_near)
+    glEnd()
+
+    # Overlapping triangles spread evenly across MOUNTAIN_SPAN, darker to blend with distance
+    left, right = MOUNTAIN_SPAN
+    spacing = (right - left) / max(MOUNTAIN_COUNT - 1, 1)
+    width = 240  # wide base for overlap
+    glColor3f(0.18, 0.28, 0.22)
+    glBegin(GL_TRIANGLES)
+    for i in range(MOUNTAIN_COUNT):
+        x_pos = left + i * spacing
+        height = 120 + ((i * 37) % 80)
+        glVertex3f(x_pos - width, gy, z_far)
+        glVertex3f(x_pos, gy + height, z_far)
+        glVertex3f(x_pos + width, gy, z_far)
+    glEnd()
+    glEnable(GL_LIGHTING)
+
+
+def set_backdrop(mountains=None, horizon=None):
+    """Change the backdrop detail; it is rebuilt on the next frame."""
+    global MOUNTAIN_COUNT, HORIZON_DISTANCE, _drawn_key
+    if mountains is not None:
+        MOUNTAIN_COUNT = mountains
+    if horizon is not None:
+        HORIZON_DISTANCE = horizon
+    drop_model("backdrop")
+    if core:
+        core.add_mesh("backdrop", record_mesh(backdrop_shape))
+    _drawn_key = None  # redraw even on a static screen
+
+
+def bullet_shape():
+    glPushMatrix()
+    glDisable(GL_LIGHTING)
+
     # Bullet body - bright yellow/orange
     glColor3f(1.0, 0.8, 0.0)
     glPushMatrix()
     glScalef(0.15, 0.15, 0.5)
     glutSolidCube(20)
     glPopMatrix()
-    
+
     # Bullet trail
     glColor3f(1.0, 0.5, 0.0)
     glPushMatrix()
@@ -769,153 +913,236 @@ def draw_bullet(x, z):
     glScalef(0.1, 0.1, 0.3)
     glutSolidCube(20)
     glPopMatrix()
-    
+
     glEnable(GL_LIGHTING)
     glPopMatrix()
 
 
 def draw_bullets():
     """Draw all active bullets"""
-    for b in bullets:
-        draw_bullet(b["x"], b["z"])
-
-
-def update_bullets(dt):
-    """Update bullet positions and check collisions with obstacles"""
-    global bullets, obstacles, collect_score
-    
-    if not cheat_mode:
+    for b in state.bullets:
+        draw_bullet(b.x, b.z + bullet_shift)
+
+
+# Model cache: static models compiled once into display lists
+USE_MODEL_CACHE = True
+MODEL_BUILDERS = {
+    "player_car": draw_player_car,
+    "enemy_car": draw_enemy_car,
+    "barrier": draw_barrier,
+    "collectible_cube": collectible_cube_shape,
+    "shield_powerup": shield_powerup_shape,
+    "enemy_car_mid": draw_enemy_car_mid,
+    "enemy_car_far": draw_enemy_car_far,
+    "barrier_far": draw_barrier_far,
+    "collectible_cube_solid": collectible_cube_solid_shape,
+    "shield_powerup_solid": shield_powerup_solid_shape,
+    "gun": draw_gun,
+    "bullet": bullet_shape,
+    "backdrop": backdrop_shape,
+}
+_model_lists = {}  # name -> display list id, 0 when drawn in immediate mode
+
+
+def model_list(name):
+    """The model's display list, compiled on first use. Needs a current GL context."""
+    lst = _model_lists.get(name)
+    if lst is None:
+        lst = 0
+        if USE_MODEL_CACHE:
+            try:
+                lst = glGenLists(1)
+                if lst:
+                    glNewList(lst, GL_COMPILE)
+                    MODEL_BUILDERS[name]()
+                    glEndList()
+            except GLError:
+                # No display lists on this driver: keep drawing in immediate mode
+                lst = 0
+        _model_lists[name] = lst
+    return lst
+
+
+def drop_model(name):
+    """Forget a compiled model so the next draw rebuilds it."""
+    lst = _model_lists.pop(name, 0)
+    if lst:
+        glDeleteLists(lst, 1)
+
+
+def build_model_cache():
+    """Compile every model now rather than on first draw."""
+    for name in MODEL_BUILDERS:
+        model_list(name)
+
+
+def draw_model(name):
+    lst = model_list(name)
+    if lst:
+        glCallList(lst)
+    else:
+        MODEL_BUILDERS[name]()
+
+
+# Obstacle level of detail: model per tier, nearest first. An obstacle
+# closer to the player than LOD_DISTANCES[i] (along z) uses tier i,
+# anything further the last tier. Pickups stop animating from
+# LOD_STATIC_TIER on.
+USE_LOD = True
+LOD_DISTANCES = (250.0, 550.0)
+LOD_STATIC_TIER = 2
+OBSTACLE_LODS = {
+    "car": ("enemy_car", "enemy_car_mid", "enemy_car_far"),
+    "barrier": ("barrier", "barrier", "barrier_far"),
+    "cube": ("collectible_cube", "collectible_cube_solid", "collectible_cube_solid"),
+    "shield": ("shield_powerup", "shield_powerup_solid", "shield_powerup_solid"),
+}
+lod_counts = [0] * (len(LOD_DISTANCES) + 1)  # obstacles drawn per tier last frame
+pickup_matrices = {}  # kind -> column-major spin / pulse matrix for this frame
+
+# Instanced obstacles: one VBO per model, recorded from the model functions
+USE_INSTANCING = True
+_obstacle_batches = {}  # model name -> InstancedMesh
+
+# Bounding sphere radius per obstacle kind, around its draw position
+PICKUP_MAX_PULSE = 1.2  # largest scale the pickup animations reach
+DEFAULT_CULL_RADIUS = 50.0
+obstacle_radius = {}
+
+
+def build_obstacle_batches():
+    """Needs GL 3.3 style instancing; otherwise draw_obstacles() uses display lists."""
+    from instancing import InstancedMesh, instancing_supported
+    if not USE_INSTANCING or not instancing_supported():
         return
-    
-    # Move bullets forward
-    new_bullets = []
-    for b in bullets:
-        b["z"] += BULLET_SPEED * 60 * dt
-        
-        # Remove bullets that are too far ahead
-        if b["z"] < player_z + 1000:
-            new_bullets.append(b)
-    
-    bullets = new_bullets
-    
-    # Check bullet-obstacle collisions
-    bullets_to_remove = []
-    obstacles_to_remove = []
-    
-    for b in bullets:
-        for o in obstacles:
-            # Only shoot cars and barriers, not collectibles
-            if o["kind"] in ("car", "barrier"):
-                ox = lane_x(o["lane"])
-                oz = o["z"]
-                
-                # Simple collision check
-                if abs(b["x"] - ox) < 30 and abs(b["z"] - oz) < 40:
-                    if b not in bullets_to_remove:
-                        bullets_to_remove.append(b)
-                    if o not in obstacles_to_remove:
-                        obstacles_to_remove.append(o)
-                        collect_score += 25  # bonus for destroying with gun
-    
-    # Remove hit bullets and obstacles
-    bullets = [b for b in bullets if b not in bullets_to_remove]
-    obstacles = [o for o in obstacles if o not in obstacles_to_remove]
+    try:
+        for name in sorted({name for names in OBSTACLE_LODS.values() for name in names}):
+            _obstacle_batches[name] = InstancedMesh(record_mesh(MODEL_BUILDERS[name]))
+    except (GLError, RuntimeError):
+        _obstacle_batches.clear()
 
 
-def auto_shoot(dt):
-    """Automatically shoot bullets when cheat mode is active"""
-    global shoot_timer, bullets
-    
-    if not cheat_mode or game_over or is_paused:
-        return
-    
-    shoot_timer += dt
-    if shoot_timer >= SHOOT_INTERVAL:
-        shoot_timer = 0.0
-        # Create new bullet at player position
-        bullets.append({"x": player_x, "z": player_z + 50})
+def build_cull_bounds():
+    """Bounding spheres from the recorded models (CPU only, no GL needed)."""
+    for kind, names in OBSTACLE_LODS.items():
+        lo, hi = record_mesh(MODEL_BUILDERS[names[0]]).bounds()
+        reach = [max(abs(a), abs(b)) for a, b in zip(lo, hi)]
+        obstacle_radius[kind] = math.sqrt(sum(r * r for r in reach)) * PICKUP_MAX_PULSE
 
 
 # Camera
 def setupCamera():
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    gluPerspective(fovY, WINDOW_W / float(WINDOW_H), 0.1, 5000.0)
+    gluPerspective(fovY, WINDOW_W / float(WINDOW_H), Z_NEAR, Z_FAR)
 
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
 
-    px = player_x
-    pz = player_z
-
-    if camera_mode_third:
-        cx, cy, cz = px, 120, pz - 250
-        lx, ly, lz = px, 30, pz + 200
-    else:
-        cx, cy, cz = px, 40, pz + 10
-        lx, ly, lz = px, 40, pz + 300
-
+    (cx, cy, cz), (lx, ly, lz) = camera_pose()
     gluLookAt(cx, cy, cz,
               lx, ly, lz,
               0, 1, 0)
 
+    if USE_CULLING:
+        frustum.set_matrix(mat_mul(*camera_matrices()))
+
+
+def camera_pose():
+    """Eye position and look-at point for the current camera mode."""
+    px = view_x
+    pz = view_z
+
+    if camera_mode_third:
+        return (px, 120, pz - 250), (px, 30, pz + 200)
+    return (px, 40, pz + 10), (px, 40, pz + 300)
+
+
+def camera_matrices():
+    """(projection, view) as row-major matrices, matching setupCamera()."""
+    eye, center = camera_pose()
+    return (perspective(fovY, WINDOW_W / float(WINDOW_H), Z_NEAR, Z_FAR),
+            look_at(eye, center, (0, 1, 0)))
+
 
 # Input
 def keyboardListener(key, x, y):
-    global player_lane, is_boosting, is_paused, _last_time
+    wake_frames()
+    if time_key(key):
+        return
+
+    if replaying:
+        # game input comes from the recording
+        if key in (b'f', b'F'):
+            toggle_profile_overlay()
+        elif key == b'\x1b':
+            quit_game()
+        return
 
     if key in (b'r', b'R'):
         restart_game()
         return
 
+    if key in (b'f', b'F'):
+        toggle_profile_overlay()
+        return
+
     if key in (b'p', b'P'):
-        if not game_over:
-            is_paused = not is_paused
-            _last_time = time.time()
+        if not state.game_over:
+            stepper.pending.append("pause")
+            clock.resync()
         return
 
-    if is_paused:
+    if state.is_paused:
         if key == b'\x1b':
-            glutLeaveMainLoop()
+            quit_game()
         return
 
     if key in (b'a', b'A'):
-        if player_lane > 0:
-            player_lane -= 1
+        stepper.pending.append("left")
     if key in (b'd', b'D'):
-        if player_lane < NUM_LANES - 1:
-            player_lane += 1
+        stepper.pending.append("right")
 
     if key in (b'w', b'W'):
-        is_boosting = True
+        stepper.pending.append("boost")
     if key in (b's', b'S'):
-        is_boosting = False
+        stepper.pending.append("brake")
 
     # Cheat mode toggle
     if key in (b'u', b'U'):
-        global cheat_mode, bullets, shoot_timer
-        cheat_mode = not cheat_mode
-        bullets = []
-        shoot_timer = 0.0
+        stepper.pending.append("cheat")
 
     if key == b'\x1b':
-        glutLeaveMainLoop()
+        quit_game()
+
+
+def time_key(key):
+    """Clock speed keys, also available during replays; True if key was one."""
+    low, high = TIME_SCALE_LIMITS
+    if key == b'[':
+        clock.scale = max(clock.scale / 2, low)
+    elif key == b']':
+        clock.scale = min(clock.scale * 2, high)
+    elif key == b'\\':
+        clock.paused = not clock.paused
+    else:
+        return False
+    return True
 
 
 def specialKeyListener(key, x, y):
-    global player_lane
-    if game_over or is_paused:
+    wake_frames()
+    if replaying or state.game_over or state.is_paused:
         return
     if key == GLUT_KEY_LEFT:
-        if player_lane > 0:
-            player_lane -= 1
+        stepper.pending.append("left")
     elif key == GLUT_KEY_RIGHT:
-        if player_lane < NUM_LANES - 1:
-            player_lane += 1
+        stepper.pending.append("right")
 
 
 def mouseListener(button, state, x, y):
     global camera_mode_third
+    wake_frames()
     if button == GLUT_RIGHT_BUTTON and state == GLUT_DOWN:
         camera_mode_third = not camera_mode_third
 
@@ -923,150 +1150,378 @@ def mouseListener(button, state, x, y):
 
 # Loop / rendering
 def idle():
-    global player_z, _last_time
-    global player_speed, distance_score, total_score
-    global shield_active, shield_timer
-    global player_x
-    global crash_timer
-
-    now = time.time()
-    dt = now - _last_time
-    _last_time = now
-
-    if crash_timer > 0.0:
-        crash_timer -= dt
-        if crash_timer < 0.0:
-            crash_timer = 0.0
-
-    if not game_over and not is_paused:
-        target_x = lane_x(player_lane)
-        t = LANE_LERP_SPEED * dt
-        if t > 1.0:
-            t = 1.0
-        player_x = player_x + (target_x - player_x) * t
-
-        elapsed = time.time() - start_time
-        time_bonus = elapsed * SPEED_RAMP_PER_SEC
-        points_bonus = (total_score / 100.0) * SPEED_RAMP_PER_100_POINTS
-        base_now = BASE_SPEED + time_bonus + points_bonus
-        if base_now > MAX_BASE_SPEED:
-            base_now = MAX_BASE_SPEED
-
-        if is_boosting:
-            player_speed = base_now + BOOST_ADD
-        else:
-            player_speed = base_now
+    global skipped_redraws
 
-        player_z += player_speed * 60 * dt
+    profiler.start()
+    stepper.advance(clock.tick(), clock.scale)
+    profiler.mark("sim")
 
-        distance_score = int(player_z / 35.0)
-        total_score = distance_score + collect_score
+    if USE_REDRAW_SKIP:
+        key = frame_key()
+        if key is not None and key == _drawn_key:
+            skipped_redraws += 1
+            return
+    glutPostRedisplay()
 
-        if shield_active:
-            shield_timer -= dt
-            if shield_timer <= 0.0:
-                shield_timer = 0.0
-                shield_active = False
 
-    update_obstacles(dt)
-    
-    # Cheat mode updates
-    auto_shoot(dt)
-    update_bullets(dt)
-    
-    glutPostRedisplay()
+def is_animating():
+    """False on static screens: paused (game or clock), or game over once the crash flash has faded.
 
+    Gun bullets still in flight keep the game moving: they fly on and
+    score hits while the game is paused.
+    """
+    if clock.paused:
+        return False
+    static = state.is_paused or (state.game_over and state.crash_timer <= 0.0)
+    return not static or bool(state.bullets)
 
-def showScreen():
-    glEnable(GL_DEPTH_TEST)
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-    glViewport(0, 0, WINDOW_W, WINDOW_H)
 
+def frame_key():
+    """What a static screen looks like, or None while the scene is moving.
+
+    Covers the overlay text (pause / game over, HUD values, replay clock)
+    and the view toggles; the crash flash counts as moving until it fades.
+    """
+    if is_animating():
+        return None
+    replay_time = round(stepper.ticks / recording.hz, 1) if replaying else None
+    return (state.is_paused, state.game_over, state.cheat_mode, state.shield_active, state.player_lane,
+            state.total_score, state.collect_score, camera_mode_third, show_profile, replay_time,
+            clock.scale, clock.paused)
+
+
+def frame_timer(token):
+    if token != _timer_token or not window_visible:
+        return
+    idle()
+    # Input queued on a static screen (P, R) waits for a whole tick of game
+    # time, so keep the full frame rate until it has been applied
+    waiting = bool(stepper.pending) and not clock.paused
+    glutTimerFunc(scheduler.next_delay(time.perf_counter(), is_animating() or waiting), frame_timer, token)
+
+
+def start_frames():
+    """Start a new timer chain with a frame right away; older chains die out."""
+    global _timer_token
+    _timer_token += 1
+    scheduler.reset()
+    glutTimerFunc(0, frame_timer, _timer_token)
+
+
+def wake_frames():
+    """Input on a static screen: draw the next frame now instead of at IDLE_FPS."""
+    if TARGET_FPS and window_visible and not is_animating():
+        start_frames()
+
+
+def visibility(status):
+    global window_visible
+    window_visible = status == GLUT_VISIBLE
+    if not window_visible:
+        if not TARGET_FPS:
+            glutIdleFunc(None)
+        return
+    clock.resync()  # the game stays frozen while hidden
+    if TARGET_FPS:
+        start_frames()
+    else:
+        glutIdleFunc(idle)
+
+
+def toggle_profile_overlay():
+    global show_profile, _profile_updated
+    show_profile = not show_profile
+    _profile_updated = 0.0
+
+
+def draw_profile_overlay():
+    global _profile_lines, _profile_updated
+    now = time.perf_counter()
+    if now - _profile_updated >= PROFILE_OVERLAY_REFRESH:
+        _profile_lines = profiler.overlay_lines()
+        if USE_CULLING:
+            _profile_lines.append("Drawn: " + frustum.summary())
+        if USE_LOD:
+            _profile_lines.append("LOD: " + "  ".join(
+                "tier {} {}".format(tier, n) for tier, n in enumerate(lod_counts)))
+        if USE_REDRAW_SKIP:
+            _profile_lines.append("Skipped redraws: {}".format(skipped_redraws))
+        _profile_updated = now
+    for i, line in enumerate(_profile_lines):
+        show_text("profile%d" % i, 10, WINDOW_H - 170 - 25 * i, line)
+
+
+def draw_world():
     setupCamera()
+    profiler.mark("camera")
     draw_environment()
+    profiler.mark("environment")
     draw_obstacles()
+    profiler.mark("obstacles")
 
     glPushMatrix()
-    glTranslatef(player_x, 20, player_z)
-    draw_player_car()
+    glTranslatef(view_x, 20, view_z)
+    draw_model("player_car")
     # Draw gun if cheat mode is active
-    if cheat_mode:
-        draw_gun()
+    if state.cheat_mode:
+        draw_model("gun")
     glPopMatrix()
     
     # Draw bullets if cheat mode is active
-    if cheat_mode:
+    if state.cheat_mode:
         draw_bullets()
+    profiler.mark("player")
 
-    glDisable(GL_LIGHTING)
 
-    if cheat_mode:
-        power_text = "Power: GUN MODE (CHEAT)"
-    elif shield_active:
-        power_text = f"Power: SHIELD ({shield_timer:.1f}s)"
+def draw_world_core():
+    """draw_world() through the core-profile renderer: one instanced call per model."""
+    projection, view = camera_matrices()
+    if USE_CULLING:
+        frustum.set_matrix(mat_mul(projection, view))
+    core.begin_frame(projection, view)
+    profiler.mark("camera")
+
+    glDepthMask(GL_FALSE)
+    core.draw("backdrop", [0, 0, view_z])
+    glDepthMask(GL_TRUE)
+    offsets = []
+    for z in visible_segments():
+        offsets.extend((0, 0, z))
+    core.draw("road_segment", offsets)
+    profiler.mark("environment")
+
+    update_pickup_matrices(clock.now)
+    for (kind, tier), group in visible_obstacles().items():
+        offsets = []
+        for x, z in group:
+            offsets.extend((x, 10, z))
+        core.draw(OBSTACLE_LODS[kind][tier], offsets, pickup_matrices.get(kind) if tier < LOD_STATIC_TIER else None)
+    profiler.mark("obstacles")
+
+    core.draw("player_car", [view_x, 20, view_z])
+    if state.cheat_mode:
+        core.draw("gun", [view_x, 20, view_z])
+        offsets = []
+        for b in state.bullets:
+            offsets.extend((b.x, 15, b.z + bullet_shift))
+        core.draw("bullet", offsets)
+    core.end_frame()
+    profiler.mark("player")
+
+
+def build_core_renderer():
+    """Record every model and the road segment into the core renderer's buffers."""
+    global core
+    from core_renderer import CoreRenderer, core_supported
+    if not core_supported():
+        raise RuntimeError("needs OpenGL 3.3 vertex arrays, instancing and shaders")
+    ambient = tuple(a + b for a, b in zip(LIGHT_MODEL_AMBIENT, LIGHT_AMBIENT))
+    renderer = CoreRenderer(LIGHT_POSITION, ambient, LIGHT_DIFFUSE)
+    for name, builder in MODEL_BUILDERS.items():
+        renderer.add_mesh(name, record_mesh(builder))
+    renderer.add_mesh("road_segment", record_mesh(draw_road_segment, 0.0))
+    core = renderer
+
+
+def showScreen():
+    global view_x, view_z, obstacle_shift, bullet_shift, _drawn_key
+    profiler.start()
+    _drawn_key = frame_key()
+    view_x, view_z, obstacle_shift, bullet_shift = state.interpolate(stepper.alpha)
+
+    glEnable(GL_DEPTH_TEST)
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glViewport(0, 0, WINDOW_W, WINDOW_H)
+
+    if core:
+        draw_world_core()
     else:
-        power_text = "Power: None"
+        draw_world()
 
-    draw_text(
-        10, WINDOW_H - 80,
-        f"Speed: {player_speed:.2f}  Lane: {player_lane}  Distance: {distance_score}  Collect: {collect_score}  Total: {total_score}"
-    )
-    draw_text(
-        10, WINDOW_H - 110,
-        f"{power_text}   |   Spawn: {spawn_interval:.2f}   |   Cam: {'3rd' if camera_mode_third else '1st'}"
+    glDisable(GL_LIGHTING)
+
+    # HUD values are rounded to what is displayed, so a line is only
+    # re-laid out when its text would actually change
+    show_text(
+        "status", 10, WINDOW_H - 80,
+        "Speed: {:.2f}  Lane: {}  Distance: {}  Collect: {}  Total: {}",
+        round(state.player_speed, 2), state.player_lane, state.distance_score,
+        state.collect_score, state.total_score
     )
-    draw_text(
-        10, WINDOW_H - 140,
-        "A/D: lane | W/S: boost | P: pause | R: restart | U: cheat gun | Right click: camera"
+    cam = "3rd" if camera_mode_third else "1st"
+    spawn = round(state.spawn_interval, 2)
+    if state.cheat_mode:
+        show_text("power", 10, WINDOW_H - 110, "Power: GUN MODE (CHEAT)   |   Spawn: {:.2f}   |   Cam: {}", spawn, cam)
+    elif state.shield_active:
+        show_text("power", 10, WINDOW_H - 110, "Power: SHIELD ({:.1f}s)   |   Spawn: {:.2f}   |   Cam: {}",
+                  round(state.shield_timer, 1), spawn, cam)
+    else:
+        show_text("power", 10, WINDOW_H - 110, "Power: None   |   Spawn: {:.2f}   |   Cam: {}", spawn, cam)
+    show_text(
+        "help", 10, WINDOW_H - 140,
+        "A/D: lane | W/S: boost | P: pause | R: restart | U: cheat gun | F: frame stats | Right click: camera"
     )
-
-    if is_paused and not game_over:
-        draw_text(WINDOW_W // 2 - 55, WINDOW_H // 2 + 10, "PAUSED")
-        draw_text(WINDOW_W // 2 - 140, WINDOW_H // 2 - 20, "Press P to resume")
-
-    if game_over:
-        draw_text(WINDOW_W // 2 - 90, WINDOW_H // 2 + 10, "GAME OVER")
-        draw_text(WINDOW_W // 2 - 170, WINDOW_H // 2 - 20, "Press R to restart or ESC to quit")
+    if show_profile:
+        draw_profile_overlay()
+    if replaying:
+        show_text("replay", WINDOW_W - 260, WINDOW_H - 80, "Replay: {:.1f}s / {:.1f}s",
+                  round(stepper.ticks / recording.hz, 1), round(recording.ticks / recording.hz, 1))
+    if clock.paused or clock.scale != 1.0:
+        show_text("clock", WINDOW_W - 260, WINDOW_H - 110, "Time: {}",
+                  "frozen" if clock.paused else "x{:g}".format(clock.scale))
+
+    if state.is_paused and not state.game_over:
+        show_text("paused", WINDOW_W // 2 - 55, WINDOW_H // 2 + 10, "PAUSED")
+        show_text("paused_hint", WINDOW_W // 2 - 140, WINDOW_H // 2 - 20, "Press P to resume")
+
+    if state.game_over:
+        show_text("game_over", WINDOW_W // 2 - 90, WINDOW_H // 2 + 10, "GAME OVER")
+        show_text("game_over_hint", WINDOW_W // 2 - 170, WINDOW_H // 2 - 20, "Press R to restart or ESC to quit")
+
+    if hud:
+        hud.draw(WINDOW_W, WINDOW_H)
 
     draw_crash_flash()
 
     glEnable(GL_LIGHTING)
-    glutSwapBuffers()
+    profiler.mark("hud")
+    present_frame()
+    profiler.mark("swap")
+    profiler.end_frame()
+
+    if STARTUP_REPORT and _startup_mark is not None and "first_frame" not in _startup:
+        _startup["first_frame"] = time.perf_counter() - _startup_mark
+        report_startup()
 
 
 # Main
-def main():
-    global player_x
-    glutInit()
-    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
-    glutInitWindowSize(WINDOW_W, WINDOW_H)
-    glutInitWindowPosition(100, 50)
-    glutCreateWindow(b"3D Endless Lamborghini Highway")
+def present_frame():
+    """Swap buffers, reading the frame back first when capturing."""
+    if capture:
+        capture.grab()
+    glutSwapBuffers()
+
 
+def stop_capture():
+    """Flush the frames still being read back; needs the GL context, so before the window goes."""
+    global capture
+    if capture:
+        capture.close()
+        capture = None
+
+
+def quit_game():
+    stop_capture()
+    glutLeaveMainLoop()
+
+
+def init_gl():
+    """Lighting and the cached GPU resources. Needs a current GL context."""
+    global RENDERER
     glEnable(GL_LIGHTING)
     glEnable(GL_LIGHT0)
 
-    light_diffuse = [0.9, 0.9, 0.9, 1.0]
-    light_ambient = [0.2, 0.2, 0.25, 1.0]
-    light_pos = [0.0, 300.0, 200.0, 1.0]
-
-    glLightfv(GL_LIGHT0, GL_POSITION, light_pos)
-    glLightfv(GL_LIGHT0, GL_DIFFUSE, light_diffuse)
-    glLightfv(GL_LIGHT0, GL_AMBIENT, light_ambient)
+    glLightfv(GL_LIGHT0, GL_POSITION, list(LIGHT_POSITION) + [1.0])
+    glLightfv(GL_LIGHT0, GL_DIFFUSE, list(LIGHT_DIFFUSE) + [1.0])
+    glLightfv(GL_LIGHT0, GL_AMBIENT, list(LIGHT_AMBIENT) + [1.0])
 
     glEnable(GL_COLOR_MATERIAL)
     glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
+    glClearColor(*SKY_COLOR)
+
+    if RENDERER == "core":
+        try:
+            build_core_renderer()
+        except (GLError, RuntimeError) as e:
+            print("Core renderer unavailable ({}), using fixed-function".format(e), file=sys.stderr)
+            RENDERER = "fixed"
+
+    if not LAZY_BUILD:
+        build_model_cache()
+        for builder in (build_cull_bounds, build_obstacle_batches, build_road_streamer, build_hud):
+            build_once(builder)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="3D Endless Lamborghini Highway")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="FILE", help="record the seed and inputs to FILE")
+    group.add_argument("--replay", metavar="FILE", help="play back a recording in real time")
+    parser.add_argument("--capture", metavar="DIR", help="save every frame as a PNG in DIR")
+    parser.add_argument("--fps", type=int, default=TARGET_FPS, help="frame rate cap, 0 for uncapped")
+    parser.add_argument("--spawner", choices=SPAWNERS, default=SPAWNER,
+                        help="spawn obstacles on a timer or from a pregenerated seeded track")
+    parser.add_argument("--seed", type=int, help="seed of the game")
+    parser.add_argument("--renderer", choices=["fixed", "core"], default=RENDERER,
+                        help="fixed-function GL or core-profile shaders")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="game speed: below 1 for slow motion, above 1 to fast forward")
+    parser.add_argument("--mountains", type=int, default=MOUNTAIN_COUNT, help="mountains on the horizon")
+    parser.add_argument("--horizon", type=float, default=HORIZON_DISTANCE, help="distance to the horizon")
+    args, _ = parser.parse_known_args()  # leave GLUT's own options alone
+    return args
+
+
+def main():
+    global _startup_mark, recording, capture, RENDERER, SPAWNER, TARGET_FPS
+    args = parse_args()
+    TARGET_FPS = scheduler.fps = args.fps
+    SPAWNER = args.spawner
+    clock.scale = args.time_scale
+    RENDERER = args.renderer
+    set_backdrop(args.mountains, args.horizon)
+    if args.replay:
+        start_replay(Recording.load(args.replay))
+    elif args.record:
+        recording = Recording(args.seed, spawner=SPAWNER)
+        new_game(recording.seed)
+        stepper.recorder = recording
+    elif args.seed is not None or SPAWNER != "timer":
+        new_game(args.seed)
+
+    load_gl()
+    t0 = time.perf_counter()
+    glutInit()
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
+    glutInitWindowSize(WINDOW_W, WINDOW_H)
+    glutInitWindowPosition(100, 50)
+    glutCreateWindow(b"3D Endless Lamborghini Highway")
 
-    player_x = lane_x(player_lane)
+    init_gl()
+    _startup_mark = time.perf_counter()
+    _startup["window"] = _startup_mark - t0
+    clock.resync()
+    if args.capture:
+        from frame_capture import FrameCapture
+        capture = FrameCapture(WINDOW_W, WINDOW_H, args.capture)
 
     glutDisplayFunc(showScreen)
     glutKeyboardFunc(keyboardListener)
     glutSpecialFunc(specialKeyListener)
     glutMouseFunc(mouseListener)
-    glutIdleFunc(idle)
+    glutVisibilityFunc(visibility)
+    if TARGET_FPS:
+        start_frames()
+    else:
+        glutIdleFunc(idle)
+
+    # Return from glutMainLoop on ESC / window close so the profile gets written
+    if glutSetOption:
+        glutSetOption(GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_GLUTMAINLOOP_RETURNS)
+    if glutCloseFunc:
+        glutCloseFunc(stop_capture)
 
     glutMainLoop()
 
+    if PROFILE_CSV:
+        profiler.write_csv(PROFILE_CSV)
+    if args.record:
+        recording.ticks = stepper.ticks
+        recording.save(args.record)
+
+
+_startup["import"] = time.perf_counter() - _import_start
 
 if __name__ == "__main__":
     main()
+
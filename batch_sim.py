@@ -0,0 +1,248 @@
+"""N independent games stepped together with numpy.
+
+Same rules as GameState.step() (player, speed ramp, shield, obstacle
+hits, spawning) but every field is an array over games, so one step is
+a fixed number of array operations whatever N is. Obstacle z moves by
+subtraction like the "array" obstacle store. Only the driving actions
+are supported: no pause and no cheat gun. Each game draws its spawns
+from a shared numpy generator, so runs are reproducible per seed but
+don't match a GameState with the same seed.
+"""
+from game_state import (
+    BASE_SPEED, BOOST_ADD, CRASH_DURATION, DESPAWN_BEHIND, ENEMY_DESTROY_BONUS, LANE_LERP_SPEED,
+    LANE_XS, NUM_LANES, SHIELD_DURATION, SIM_HZ, SPAWN_AHEAD, SPAWN_SPACING, Difficulty,
+    base_speed, pickup_chances, spawn_interval,
+)
+from obstacles import KINDS, kind_arrays
+
+try:
+    import numpy as np
+except ImportError:  # only the batch simulator needs numpy
+    np = None
+
+
+# One action per game per step
+BATCH_ACTIONS = ("none", "left", "right", "boost", "brake")
+NONE, LEFT, RIGHT, BOOST, BRAKE = range(len(BATCH_ACTIONS))
+
+CAR, BARRIER, CUBE, SHIELD = (KINDS.index(k) for k in ("car", "barrier", "cube", "shield"))
+
+
+class BatchSim:
+    """State of n games in arrays; step(actions) advances them all one tick.
+
+    Obstacles live in (n, capacity) arrays. Spawns are at least
+    SPAWN_SPACING apart and despawn DESPAWN_BEHIND units behind the
+    player, so a game never holds more than three at once.
+    """
+
+    def __init__(self, n, seed=None, capacity=6, dt=1.0 / SIM_HZ, difficulty=None):
+        if np is None:
+            raise RuntimeError("the batch simulator needs numpy")
+        self.n = n
+        self.dt = dt
+        self.difficulty = difficulty or Difficulty()
+        self.rng = np.random.default_rng(seed)
+
+        self.lane_xs = np.array(LANE_XS, dtype=np.float64)
+        self.ext_x, self.ext_z, self.is_hazard = kind_arrays()
+
+        # Player / score, one entry per game
+        self.lane = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n)
+        self.z = np.zeros(n)
+        self.speed = np.zeros(n)
+        self.boosting = np.zeros(n, dtype=bool)
+        self.collect_score = np.zeros(n, dtype=np.int64)
+        self.distance_score = np.zeros(n, dtype=np.int64)
+        self.total_score = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.shield_active = np.zeros(n, dtype=bool)
+        self.shield_timer = np.zeros(n)
+        self.crash_timer = np.zeros(n)
+        self.spawn_timer = np.zeros(n)
+        self.spawn_interval = np.zeros(n)
+        self.elapsed = np.zeros(n)
+
+        # Obstacles, one row per game
+        self.obstacle_z = np.zeros((n, capacity))
+        self.obstacle_lane = np.zeros((n, capacity), dtype=np.int64)
+        self.obstacle_kind = np.zeros((n, capacity), dtype=np.int64)
+        self.obstacle_seq = np.zeros((n, capacity), dtype=np.int64)  # spawn order within a game
+        self.alive = np.zeros((n, capacity), dtype=bool)
+        self.next_seq = np.zeros(n, dtype=np.int64)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Restart every game, or only those where mask is True."""
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.lane[mask] = 1
+        self.x[mask] = self.lane_xs[1]
+        self.z[mask] = 0.0
+        self.speed[mask] = BASE_SPEED
+        self.boosting[mask] = False
+        self.collect_score[mask] = 0
+        self.distance_score[mask] = 0
+        self.total_score[mask] = 0
+        self.game_over[mask] = False
+        self.shield_active[mask] = False
+        self.shield_timer[mask] = 0.0
+        self.crash_timer[mask] = 0.0
+        self.spawn_timer[mask] = 0.0
+        self.spawn_interval[mask] = 0.8
+        self.elapsed[mask] = 0.0
+        self.alive[mask] = False
+
+    def draw_spawns(self, rows):
+        """Random (lane, kind roll, car-or-barrier pick) arrays for a spawn in each game of rows."""
+        rng = self.rng
+        count = len(rows)
+        return rng.integers(0, NUM_LANES, count), rng.random(count), rng.random(count) < 0.5
+
+    def step(self, actions):
+        """Advance every game one tick. actions: int array of BATCH_ACTIONS indices.
+
+        Returns (done, total_score) arrays; done games stay frozen until reset().
+        """
+        dt = self.dt
+        d = self.difficulty
+        actions = np.asarray(actions)
+
+        # Input
+        self.lane -= (actions == LEFT) & (self.lane > 0)
+        self.lane += (actions == RIGHT) & (self.lane < NUM_LANES - 1)
+        self.boosting |= actions == BOOST
+        self.boosting &= actions != BRAKE
+
+        self.elapsed += dt
+        self.crash_timer = np.maximum(self.crash_timer - dt, 0.0)
+
+        # Player
+        live = ~self.game_over
+        t = min(LANE_LERP_SPEED * dt, 1.0)
+        target_x = self.lane_xs[self.lane]
+        self.x = np.where(live, self.x + (target_x - self.x) * t, self.x)
+
+        base_now = base_speed(self.elapsed, self.total_score, d, np.minimum)
+        speed = np.where(self.boosting, base_now + BOOST_ADD, base_now)
+        self.speed = np.where(live, speed, self.speed)
+        move = np.where(live, self.speed * 60 * dt, 0.0)
+        self.z += move
+
+        self.distance_score = np.where(live, (self.z / 35.0).astype(np.int64), self.distance_score)
+        self.total_score = np.where(live, self.distance_score + self.collect_score, self.total_score)
+
+        shielded = live & self.shield_active
+        self.shield_timer = np.where(shielded, self.shield_timer - dt, self.shield_timer)
+        expired = shielded & (self.shield_timer <= 0.0)
+        self.shield_timer[expired] = 0.0
+        self.shield_active[expired] = False
+
+        # Obstacles
+        self.obstacle_z -= move[:, None]
+        self.alive &= ~(live[:, None] & (self.obstacle_z <= (self.z - DESPAWN_BEHIND)[:, None]))
+        self._hits(live)
+
+        live = ~self.game_over
+        self.spawn_timer = np.where(live, self.spawn_timer + dt, self.spawn_timer)
+        due = live & (self.spawn_timer >= self.spawn_interval)
+        if due.any():
+            self.spawn_timer[due] = 0.0
+            self._spawn(np.flatnonzero(due))
+
+        return self.game_over.copy(), self.total_score.copy()
+
+    def _hits(self, live):
+        kind = self.obstacle_kind
+        hit = self.alive & live[:, None]
+        hit &= np.abs(self.lane_xs[self.obstacle_lane] - self.x[:, None]) < self.ext_x[kind]
+        hit &= np.abs(self.obstacle_z - self.z[:, None]) < self.ext_z[kind]
+
+        # Each pass handles the earliest-spawned remaining hit of every game,
+        # so pickups and shield hits apply in the same order as GameState
+        pending = hit
+        while True:
+            rows = np.flatnonzero(pending.any(axis=1))
+            if not len(rows):
+                return
+            seq = np.where(pending[rows], self.obstacle_seq[rows], np.iinfo(np.int64).max)
+            cols = seq.argmin(axis=1)
+            pending[rows, cols] = False
+
+            kinds = kind[rows, cols]
+            cube = kinds == CUBE
+            shield = kinds == SHIELD
+            hazard = self.is_hazard[kinds]
+            absorbed = hazard & self.shield_active[rows]
+            crash = hazard & ~absorbed
+
+            self.collect_score[rows[cube]] += 10
+            self.collect_score[rows[absorbed]] += ENEMY_DESTROY_BONUS
+            self.shield_active[rows[shield]] = True
+            self.shield_timer[rows[shield]] = SHIELD_DURATION
+            self.shield_active[rows[absorbed]] = False
+            self.shield_timer[rows[absorbed]] = 0.0
+            self.alive[rows[~crash], cols[~crash]] = False
+
+            if crash.any():
+                # the crashed-into obstacle stays; later ones were never reached
+                crashed, crash_cols = rows[crash], cols[crash]
+                self.game_over[crashed] = True
+                self.crash_timer[crashed] = CRASH_DURATION
+                last_seq = self.obstacle_seq[crashed, crash_cols]
+                self.alive[crashed] &= self.obstacle_seq[crashed] <= last_seq[:, None]
+                pending[crashed] = False
+
+    def _spawn(self, rows):
+        z_spawn = self.z[rows] + SPAWN_AHEAD
+        near = self.alive[rows] & (np.abs(self.obstacle_z[rows] - z_spawn[:, None]) < SPAWN_SPACING)
+        clear = ~near.any(axis=1)
+        rows, z_spawn = rows[clear], z_spawn[clear]
+        if not len(rows):
+            return
+
+        d = self.difficulty
+        lanes, roll, pick = self.draw_spawns(rows)
+        cube_below, shield_below = pickup_chances(d)
+        kinds = np.where(roll < cube_below, CUBE, np.where(roll < shield_below, SHIELD, np.where(pick, BARRIER, CAR)))
+
+        cols = self.alive[rows].argmin(axis=1)
+        if self.alive[rows, cols].any():
+            raise RuntimeError("obstacle capacity exceeded")
+        self.obstacle_z[rows, cols] = z_spawn
+        self.obstacle_lane[rows, cols] = lanes
+        self.obstacle_kind[rows, cols] = kinds
+        self.obstacle_seq[rows, cols] = self.next_seq[rows]
+        self.alive[rows, cols] = True
+        self.next_seq[rows] += 1
+
+        self.spawn_interval[rows] = spawn_interval(self.elapsed[rows], d, np.maximum)
+
+
+def dodge_actions(sim, lookahead=400, reaction=1.0, rng=None):
+    """A simple bot for every game: leave the lane when a car or barrier is
+    within lookahead ahead, for a neighbouring lane that is clear.
+
+    reaction < 1 is the chance per tick that a game's bot notices at all,
+    which makes higher speeds harder for it, like a human.
+    """
+    hazard = sim.alive & sim.is_hazard[sim.obstacle_kind]
+    dz = sim.obstacle_z - sim.z[:, None]
+    hazard &= (dz > -60) & (dz < lookahead)
+    blocked = np.zeros((sim.n, NUM_LANES), dtype=bool)
+    for lane in range(NUM_LANES):
+        blocked[:, lane] = (hazard & (sim.obstacle_lane == lane)).any(axis=1)
+
+    rows = np.arange(sim.n)
+    lane = sim.lane
+    here = blocked[rows, lane]
+    if reaction < 1.0:
+        here &= (rng or sim.rng).random(sim.n) < reaction
+    left_free = (lane > 0) & ~blocked[rows, np.maximum(lane - 1, 0)]
+    right_free = (lane < NUM_LANES - 1) & ~blocked[rows, np.minimum(lane + 1, NUM_LANES - 1)]
+    actions = np.full(sim.n, NONE)
+    actions[here & right_free] = RIGHT
+    actions[here & left_free] = LEFT
+    return actions
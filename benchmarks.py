@@ -0,0 +1,456 @@
+"""Timing scripts for the simulation and rendering hot paths.
+
+    python benchmarks.py bullets                  # update_bullets() vs the old loop
+    python benchmarks.py sim                      # ticks/sec per scenario, JSON
+    python benchmarks.py batch                    # game ticks/sec of batch_sim.BatchSim
+    python benchmarks.py render                   # frames/sec per scenario, JSON
+    python benchmarks.py render --gl egl          # real software rendering (Mesa)
+    python benchmarks.py all --out bench.json
+
+Rendering needs no GPU. The "recorded" backend swaps every GL/GLU/GLUT
+function for a counting no-op, so it measures the Python cost of issuing
+a frame plus the number of GL calls; "egl" draws into an offscreen EGL
+surface, which Mesa's llvmpipe provides on a headless box.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import time
+from collections import Counter
+
+from entities import Bullet
+from game_state import GameState, LANE_XS, NUM_LANES, SPAWNERS
+from obstacles import HAZARDS, OBSTACLE_STORES
+from offscreen import egl_context, gl_cubes
+from scheduler import FrameClock
+
+
+def naive_bullet_hits(bullets, hazards):
+    """The old every-bullet-vs-every-obstacle loop with list membership, for comparison."""
+    bullets_to_remove = []
+    obstacles_to_remove = []
+    for b in bullets:
+        for o, ox, oz in hazards:
+            if abs(b.x - ox) < 30 and abs(b.z - oz) < 40:
+                if b not in bullets_to_remove:
+                    bullets_to_remove.append(b)
+                if o not in obstacles_to_remove:
+                    obstacles_to_remove.append(o)
+    return bullets_to_remove, obstacles_to_remove
+
+
+def cheat_state(num_bullets, num_obstacles, seed=0, obstacle_store="lanes"):
+    """A game in gun mode with bullets and cars scattered over the next 1000 units."""
+    rng = random.Random(seed)
+    state = GameState(seed=seed, obstacle_store=obstacle_store)
+    state.cheat_mode = True
+    for _ in range(num_obstacles):
+        state.obstacles.add(rng.randrange(NUM_LANES), rng.uniform(0, 1000), rng.choice(["car", "barrier"]))
+    for _ in range(num_bullets):
+        b = Bullet()
+        b.x = rng.choice(LANE_XS) + rng.uniform(-10, 10)
+        b.z = rng.uniform(0, 1000)
+        state.bullets.append(b)
+    return state
+
+
+def bench_bullets(counts=(10, 100, 1000), repeat=5, naive_limit=300):
+    """Cost of one update_bullets() call against bullet and obstacle counts."""
+    rows = []
+    for num_bullets in counts:
+        for num_obstacles in counts:
+            best = float("inf")
+            for r in range(repeat):
+                state = cheat_state(num_bullets, num_obstacles, seed=r)
+                t0 = time.perf_counter()
+                state.update_bullets(0.0)
+                best = min(best, time.perf_counter() - t0)
+
+            naive = None
+            if max(num_bullets, num_obstacles) <= naive_limit:
+                state = cheat_state(num_bullets, num_obstacles)
+                hazards = state.obstacles.hazards()
+                t0 = time.perf_counter()
+                naive_bullet_hits(state.bullets, hazards)
+                naive = time.perf_counter() - t0
+
+            rows.append((num_bullets, num_obstacles, best, naive))
+    return rows
+
+
+def print_bullets(rows):
+    print(f"{'bullets':>8} {'obstacles':>10} {'update ms':>10} {'naive ms':>10}")
+    for num_bullets, num_obstacles, t, naive in rows:
+        naive_text = f"{naive * 1000:10.3f}" if naive is not None else f"{'-':>10}"
+        print(f"{num_bullets:>8} {num_obstacles:>10} {t * 1000:10.3f} {naive_text}")
+
+
+# Scenarios: setup(state) once and after every crash, drive(state, rng)
+# before every tick; drive returns the tick's input actions
+def blocked_lanes(state, lookahead):
+    pz = state.player_z
+    return {lane for lane, z, kind in state.obstacles.items()
+            if kind in HAZARDS and pz - 60 < z < pz + lookahead}
+
+
+def autopilot(state, lookahead):
+    """Steer out of a lane with a car or barrier coming up."""
+    lane = state.player_lane
+    blocked = blocked_lanes(state, lookahead)
+    if lane not in blocked:
+        return ()
+    for target in (lane - 1, lane + 1):
+        if 0 <= target < NUM_LANES and target not in blocked:
+            return ("left",) if target < lane else ("right",)
+    return ()
+
+
+def setup_normal(state):
+    pass
+
+
+def drive_normal(state, rng):
+    return autopilot(state, 400)
+
+
+def setup_max_speed(state):
+    state.elapsed = 1000.0  # past the speed ramp and the spawn-rate ramp
+    state.is_boosting = True
+
+
+def drive_max_speed(state, rng):
+    return autopilot(state, 900)
+
+
+def setup_gun(state):
+    state.cheat_mode = True
+
+
+def drive_gun(state, rng, num_bullets=200):
+    """Keep the screen full of bullets on top of the auto-fire."""
+    pz = state.player_z
+    while len(state.bullets) < num_bullets:
+        b = state.bullet_pool.acquire()
+        b.x = rng.choice(LANE_XS) + rng.uniform(-10, 10)
+        b.z = pz + rng.uniform(0, 1000)
+        state.bullets.append(b)
+    return ()
+
+
+def setup_dense(state):
+    pass
+
+
+def drive_dense(state, rng, reach=3000):
+    """Cars and barriers every 15-30 units in the outer lanes, pickups in the middle.
+
+    The player stays in the middle lane, and the spacing keeps the normal
+    spawner from ever finding a gap.
+    """
+    pz = state.player_z
+    far = max((z for lane, z, kind in state.obstacles.items()), default=pz + 200)
+    while far < pz + reach:
+        far += rng.uniform(15, 30)
+        lane = rng.randrange(NUM_LANES)
+        if lane == 1:
+            kind = rng.choice(["cube", "cube", "cube", "shield"])
+        else:
+            kind = rng.choice(["car", "barrier"])
+        state.obstacles.add(lane, far, kind)
+    return ()
+
+
+SCENARIOS = {
+    "normal": (setup_normal, drive_normal),
+    "max_speed": (setup_max_speed, drive_max_speed),
+    "gun": (setup_gun, drive_gun),
+    "dense": (setup_dense, drive_dense),
+}
+
+TIMED_METHODS = ("update_obstacles", "spawn_obstacle", "release_track", "update_bullets")
+
+
+def time_methods(state, names):
+    """Wrap state's methods to total their calls and time (inclusive)."""
+    totals = {name: [0, 0.0] for name in names}
+    for name in names:
+        def timed(*args, _method=getattr(state, name), _total=totals[name]):
+            t0 = time.perf_counter()
+            result = _method(*args)
+            _total[1] += time.perf_counter() - t0
+            _total[0] += 1
+            return result
+        setattr(state, name, timed)
+    return totals
+
+
+def run_ticks(scenario, ticks, seed=1, obstacle_store="lanes", methods=(), spawner="timer"):
+    """Drive one scenario; returns (seconds inside step(), method totals)."""
+    setup, drive = SCENARIOS[scenario]
+    rng = random.Random(seed)
+    state = GameState(seed=seed, obstacle_store=obstacle_store, spawner=spawner)
+    setup(state)
+    totals = time_methods(state, methods)
+    dt = 1.0 / 120
+    elapsed = 0.0
+    for _ in range(ticks):
+        if state.game_over:
+            state.restart()
+            setup(state)
+        inputs = drive(state, rng)
+        t0 = time.perf_counter()
+        state.step(dt, inputs)
+        elapsed += time.perf_counter() - t0
+    return elapsed, totals
+
+
+def bench_sim(ticks=6000, repeat=3, obstacle_store="lanes", spawner="timer"):
+    """ticks/sec of GameState.step() and per-call cost of its hot methods, per scenario."""
+    results = {}
+    for scenario in SCENARIOS:
+        best = min(run_ticks(scenario, ticks, obstacle_store=obstacle_store, spawner=spawner)[0] for _ in range(repeat))
+        _, totals = run_ticks(scenario, ticks, obstacle_store=obstacle_store, methods=TIMED_METHODS, spawner=spawner)
+        results[scenario] = {
+            "ticks": ticks,
+            "ticks_per_sec": round(ticks / best),
+            "us_per_tick": round(best * 1e6 / ticks, 3),
+            "methods": {
+                name: {"calls": calls, "us_per_call": round(t * 1e6 / calls, 3) if calls else 0.0}
+                for name, (calls, t) in totals.items()
+            },
+        }
+    return results
+
+
+def bench_batch(sizes=(1, 256, 4096), steps=2000, seed=1):
+    """Game ticks/sec of BatchSim with random driving and instant restarts."""
+    import numpy as np
+    from batch_sim import BATCH_ACTIONS, BatchSim
+
+    results = {}
+    for n in sizes:
+        sim = BatchSim(n, seed=seed)
+        rng = np.random.default_rng(seed)
+        # mostly no input, like a player between lane changes
+        actions = rng.choice(len(BATCH_ACTIONS), size=(steps, n), p=[0.9, 0.03, 0.03, 0.02, 0.02])
+        finished = 0
+        t0 = time.perf_counter()
+        for i in range(steps):
+            done, scores = sim.step(actions[i])
+            if done.any():
+                finished += int(done.sum())
+                sim.reset(done)
+        elapsed = time.perf_counter() - t0
+        results[str(n)] = {
+            "games": n,
+            "steps": steps,
+            "game_ticks_per_sec": round(n * steps / elapsed),
+            "games_finished": finished,
+        }
+    return results
+
+
+# Rendering
+class RecordedGL:
+    """Counting stand-ins for GL/GLU/GLUT functions in a set of modules.
+
+    Every function whose name starts with prefix is replaced; calls are
+    counted by name. A few return a value the caller needs (object ids,
+    status checks); the rest return None. overrides maps a name to a
+    function to call instead.
+    """
+
+    RETURNS = {
+        "glGenLists": lambda n: 1,
+        "glGenBuffers": lambda n: 1 if n == 1 else list(range(1, n + 1)),
+        "glGenTextures": lambda n: 1,
+        "glGenFramebuffers": lambda n: 1,
+        "glCreateShader": lambda kind: 1,
+        "glCreateProgram": lambda: 1,
+        "glGetShaderiv": lambda *args: 1,
+        "glGetProgramiv": lambda *args: 1,
+        "glGetUniformLocation": lambda *args: 0,
+        "glCheckFramebufferStatus": lambda target: 0x8CD5,  # GL_FRAMEBUFFER_COMPLETE
+        "glutBitmapWidth": lambda font, c: 10,
+        "glutGet": lambda what: 0,
+    }
+
+    def __init__(self, prefix="gl", overrides=None):
+        self.prefix = prefix
+        self.overrides = overrides or {}
+        self.calls = Counter()
+        self.saved = []
+
+    def _stub(self, name):
+        calls = self.calls
+        func = self.overrides.get(name) or self.RETURNS.get(name)
+
+        def call(*args):
+            calls[name] += 1
+            if func is not None:
+                return func(*args)
+        return call
+
+    def install(self, modules):
+        for module in modules:
+            names = [n for n, v in vars(module).items() if n.startswith(self.prefix) and callable(v)]
+            for name in names:
+                self.saved.append((module, name, getattr(module, name)))
+                setattr(module, name, self._stub(name))
+
+    def uninstall(self):
+        for module, name, value in reversed(self.saved):
+            setattr(module, name, value)
+        self.saved = []
+
+
+class SteppedClock:
+    """Timer for Project's FrameClock so every frame is exactly dt long."""
+
+    def __init__(self, dt):
+        self.dt = dt
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def tick(self):
+        self.now += self.dt
+
+
+def load_renderer(backend, renderer="fixed"):
+    """Import Project with GL calls going to the chosen backend; returns (Project, RecordedGL)."""
+    if backend == "egl":
+        # must be set before OpenGL is first imported
+        os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+        os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+    import Project
+    Project.load_gl()
+    Project.RENDERER = renderer
+    import core_renderer
+    import hud
+    import instancing
+    import road
+
+    modules = (Project, core_renderer, hud, instancing, road)
+    if backend == "egl":
+        from OpenGL.GL import glFinish
+        egl_context(Project.WINDOW_W, Project.WINDOW_H)
+        # GLUT has no window here: swapping becomes a finish so the frame is
+        # really drawn, and the cubes are drawn with plain GL
+        solid_cube, wire_cube = gl_cubes()
+        gl = RecordedGL("glut", {
+            "glutSwapBuffers": lambda: glFinish(),
+            "glutSolidCube": solid_cube,
+            "glutWireCube": wire_cube,
+        })
+    else:
+        gl = RecordedGL("gl")
+    gl.install(modules)
+    Project.init_gl()
+    return Project, gl
+
+
+def bench_render(backend="recorded", frames=300, warmup=30, fps=60, camera="third", renderer="fixed"):
+    """frames/sec of idle() + showScreen() per scenario, with per-phase times,
+    frustum culling counts and obstacles drawn per LOD tier."""
+    Project, gl = load_renderer(backend, renderer)
+    from profiler import FrameProfiler
+
+    clock = SteppedClock(1.0 / fps)
+    Project.clock = FrameClock(clock.time)
+    Project.camera_mode_third = camera == "third"
+    results = {}
+    for scenario, (setup, drive) in SCENARIOS.items():
+        rng = random.Random(1)
+        Project.new_game(1)
+        state = Project.state
+        setup(state)
+        Project.clock.resync()
+        elapsed = 0.0
+        drawn, culled = Counter(), Counter()
+        lod = [0] * len(Project.lod_counts)
+        for frame in range(warmup + frames):
+            if frame == warmup:
+                Project.profiler = FrameProfiler(Project.PROFILE_PHASES)
+                gl.calls.clear()
+                elapsed = 0.0
+                drawn.clear()
+                culled.clear()
+                lod = [0] * len(Project.lod_counts)
+            if state.game_over:
+                state.restart()
+                setup(state)
+            Project.stepper.pending.extend(drive(state, rng))
+            clock.tick()
+            t0 = time.perf_counter()
+            Project.idle()
+            Project.showScreen()
+            elapsed += time.perf_counter() - t0
+            drawn.update(Project.frustum.drawn)
+            culled.update(Project.frustum.culled)
+            lod = [a + b for a, b in zip(lod, Project.lod_counts)]
+
+        summary = Project.profiler.summary()
+        result = {
+            "frames": frames,
+            "frames_per_sec": round(frames / elapsed, 1),
+            "ms_per_frame": round(elapsed * 1000.0 / frames, 3),
+            "phases_ms": {p: round(ms, 3) for p, ms in summary["phases"].items()},
+            "drawn_per_frame": {k: round(n / frames, 1) for k, n in drawn.items()},
+            "culled_per_frame": {k: round(n / frames, 1) for k, n in culled.items()},
+            "lod_tiers_per_frame": [round(n / frames, 1) for n in lod],
+        }
+        if backend == "recorded":
+            result["gl_calls_per_frame"] = round(sum(gl.calls.values()) / frames, 1)
+        results[scenario] = result
+    return results
+
+
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("bench", choices=["bullets", "sim", "batch", "render", "all"])
+    parser.add_argument("--ticks", type=int, default=6000, help="simulation ticks per scenario")
+    parser.add_argument("--frames", type=int, default=300, help="rendered frames per scenario")
+    parser.add_argument("--store", default="lanes", choices=list(OBSTACLE_STORES), help="obstacle store for sim")
+    parser.add_argument("--spawner", default="timer", choices=SPAWNERS, help="obstacle spawner for sim")
+    parser.add_argument("--gl", default="recorded", choices=["recorded", "egl"], help="rendering backend")
+    parser.add_argument("--camera", default="third", choices=["third", "first"], help="camera for render")
+    parser.add_argument("--renderer", default="fixed", choices=["fixed", "core"], help="Project renderer for render")
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.bench == "bullets":
+        print_bullets(bench_bullets())
+        return
+
+    report = {"environment": environment()}
+    if args.bench in ("sim", "all"):
+        report["sim"] = {"store": args.store, "spawner": args.spawner,
+                         "scenarios": bench_sim(args.ticks, obstacle_store=args.store, spawner=args.spawner)}
+    if args.bench in ("batch", "all"):
+        report["batch"] = bench_batch()
+    if args.bench in ("render", "all"):
+        report["render"] = {
+            "backend": args.gl,
+            "camera": args.camera,
+            "renderer": args.renderer,
+            "scenarios": bench_render(args.gl, args.frames, camera=args.camera, renderer=args.renderer),
+        }
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
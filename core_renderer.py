@@ -0,0 +1,189 @@
+import ctypes
+
+from OpenGL.GL import *
+
+from instancing import float_array, link_program
+from mesh import VERTEX_FLOATS, column_major, identity
+
+
+# Core-profile shaders: camera, model and light come in as uniforms and the
+# lighting matches fixed-function GL_LIGHT0 with GL_COLOR_MATERIAL
+SCENE_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec3 a_position;
+layout(location = 1) in vec3 a_normal;
+layout(location = 2) in vec3 a_color;
+layout(location = 3) in vec3 a_offset;
+uniform mat4 u_projection;
+uniform mat4 u_view;
+uniform mat4 u_model;
+uniform vec3 u_light_position;  // eye space
+uniform vec3 u_ambient;
+uniform vec3 u_diffuse;
+out vec3 v_color;
+
+void main() {
+    vec4 world = u_model * vec4(a_position, 1.0) + vec4(a_offset, 0.0);
+    vec4 eye = u_view * world;
+    gl_Position = u_projection * eye;
+
+    if (dot(a_normal, a_normal) == 0.0) {
+        v_color = a_color;  // unlit part
+    } else {
+        vec3 n = normalize(mat3(u_view) * (mat3(u_model) * a_normal));
+        vec3 l = normalize(u_light_position - eye.xyz);
+        v_color = a_color * (u_ambient + u_diffuse * max(dot(n, l), 0.0));
+    }
+}
+"""
+
+SCENE_FRAGMENT_SHADER = """
+#version 330 core
+in vec3 v_color;
+out vec4 frag_color;
+
+void main() {
+    frag_color = vec4(v_color, 1.0);
+}
+"""
+
+# Flat colour over the whole viewport (crash flash)
+OVERLAY_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec2 a_position;
+
+void main() {
+    gl_Position = vec4(a_position, 0.0, 1.0);
+}
+"""
+
+OVERLAY_FRAGMENT_SHADER = """
+#version 330 core
+uniform vec4 u_color;
+out vec4 frag_color;
+
+void main() {
+    frag_color = u_color;
+}
+"""
+
+IDENTITY = column_major(identity())
+
+
+def core_supported():
+    return bool(glGenVertexArrays) and bool(glDrawArraysInstanced) and bool(glCreateShader)
+
+
+class GpuMesh:
+    """A recorded Mesh in its own VAO, plus a per-instance offset buffer."""
+
+    def __init__(self, mesh):
+        self.tri_vertices = len(mesh.tris) // VERTEX_FLOATS
+        self.line_vertices = len(mesh.lines) // VERTEX_FLOATS
+        self.vao = glGenVertexArrays(1)
+        self.mesh_vbo, self.instance_vbo = glGenBuffers(2)
+
+        glBindVertexArray(self.vao)
+        data = float_array(mesh.tris + mesh.lines)  # triangles, then lines
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_vbo)
+        glBufferData(GL_ARRAY_BUFFER, ctypes.sizeof(data), data, GL_STATIC_DRAW)
+        stride = VERTEX_FLOATS * 4
+        for location, offset in ((0, 0), (1, 12), (2, 24)):
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset))
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glEnableVertexAttribArray(3)
+        glVertexAttribPointer(3, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+        glVertexAttribDivisor(3, 1)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self, offsets):
+        """offsets: flat [x, y, z, ...] list, one triple per instance."""
+        count = len(offsets) // 3
+        if not count:
+            return
+        data = float_array(offsets)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, ctypes.sizeof(data), data, GL_STREAM_DRAW)
+        if self.tri_vertices:
+            glDrawArraysInstanced(GL_TRIANGLES, 0, self.tri_vertices, count)
+        if self.line_vertices:
+            glDrawArraysInstanced(GL_LINES, self.tri_vertices, self.line_vertices, count)
+
+    def delete(self):
+        glDeleteBuffers(2, [self.mesh_vbo, self.instance_vbo])
+        glDeleteVertexArrays(1, [self.vao])
+
+
+class CoreRenderer:
+    """Draws recorded meshes with VAOs, VBOs and GLSL 3.30 core shaders only.
+
+    add_mesh() once per model, then each frame begin_frame() with the
+    camera, draw() per model with its instance offsets, flash() for a
+    full-screen tint and end_frame() to hand the context back to
+    fixed-function code (the HUD).
+    """
+
+    def __init__(self, light_position, ambient, diffuse):
+        self.meshes = {}
+        self.program = link_program(SCENE_VERTEX_SHADER, SCENE_FRAGMENT_SHADER)
+        self.u = {name: glGetUniformLocation(self.program, name)
+                  for name in ("u_projection", "u_view", "u_model", "u_light_position", "u_ambient", "u_diffuse")}
+        glUseProgram(self.program)
+        glUniform3f(self.u["u_light_position"], *light_position)
+        glUniform3f(self.u["u_ambient"], *ambient)
+        glUniform3f(self.u["u_diffuse"], *diffuse)
+        glUseProgram(0)
+
+        self.overlay_program = link_program(OVERLAY_VERTEX_SHADER, OVERLAY_FRAGMENT_SHADER)
+        self.u_color = glGetUniformLocation(self.overlay_program, "u_color")
+        self.overlay_vao = glGenVertexArrays(1)
+        self.overlay_vbo = glGenBuffers(1)
+        glBindVertexArray(self.overlay_vao)
+        data = float_array([-1, -1, 1, -1, 1, 1, -1, -1, 1, 1, -1, 1])
+        glBindBuffer(GL_ARRAY_BUFFER, self.overlay_vbo)
+        glBufferData(GL_ARRAY_BUFFER, ctypes.sizeof(data), data, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 8, ctypes.c_void_p(0))
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def add_mesh(self, name, mesh):
+        """Upload mesh under name, replacing any mesh already there."""
+        old = self.meshes.get(name)
+        self.meshes[name] = GpuMesh(mesh)
+        if old:
+            old.delete()
+
+    def begin_frame(self, projection, view):
+        """projection, view: row-major matrices (mesh.perspective / mesh.look_at)."""
+        glUseProgram(self.program)
+        glUniformMatrix4fv(self.u["u_projection"], 1, GL_FALSE, column_major(projection))
+        glUniformMatrix4fv(self.u["u_view"], 1, GL_FALSE, column_major(view))
+        glLineWidth(2.0)
+
+    def draw(self, name, offsets, model=None):
+        """model: column-major matrix applied before the offsets, or None."""
+        glUniformMatrix4fv(self.u["u_model"], 1, GL_FALSE, model or IDENTITY)
+        self.meshes[name].draw(offsets)
+
+    def flash(self, r, g, b, a):
+        glUseProgram(self.overlay_program)
+        glUniform4f(self.u_color, r, g, b, a)
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glBindVertexArray(self.overlay_vao)
+        glDrawArrays(GL_TRIANGLES, 0, 6)
+        glDisable(GL_BLEND)
+        glEnable(GL_DEPTH_TEST)
+        glBindVertexArray(0)
+        glUseProgram(0)
+
+    def end_frame(self):
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
@@ -0,0 +1,39 @@
+class Obstacle:
+    """One obstacle in an ObstacleLanes store; z is key - store.scroll."""
+
+    __slots__ = ("key", "kind", "seq", "lane")
+
+    def __init__(self):
+        self.key = 0.0
+        self.kind = "car"
+        self.seq = 0
+        self.lane = 0
+
+
+class Bullet:
+    __slots__ = ("x", "z")
+
+    def __init__(self):
+        self.x = 0.0
+        self.z = 0.0
+
+
+class Pool:
+    """Free list of reusable entities, so spawning doesn't allocate once warm."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+        self.created = 0
+
+    def acquire(self):
+        if self.free:
+            return self.free.pop()
+        self.created += 1
+        return self.factory()
+
+    def release(self, obj):
+        self.free.append(obj)
+
+    def release_all(self, objs):
+        self.free.extend(objs)
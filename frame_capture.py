@@ -0,0 +1,109 @@
+import ctypes
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+from OpenGL.GL import *
+
+
+PNG_COMPRESSION = 3  # zlib level: frames are big, speed matters more than size
+
+
+def write_png(path, width, height, pixels, level=PNG_COMPRESSION):
+    """Write RGB pixels as read by glReadPixels (bottom row first) to a PNG."""
+    row = width * 3
+    raw = b"".join(b"\x00" + pixels[y * row:(y + 1) * row] for y in range(height - 1, -1, -1))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, level)))
+        f.write(chunk(b"IEND", b""))
+
+
+class FrameCapture:
+    """Saves every grabbed frame as a numbered PNG in directory.
+
+    grab() starts an asynchronous glReadPixels into the next pixel buffer
+    object of a ring and maps the one filled ring - 1 frames earlier, which
+    the GPU has long finished, so the frame never waits for its own
+    readback. Encoding and writing happen on a worker thread (zlib releases
+    the GIL). Without PBO support frames are read back synchronously.
+    """
+
+    def __init__(self, width, height, directory, ring=3, pattern="frame_%06d.png", backlog=16):
+        self.width = width
+        self.height = height
+        self.size = width * height * 3
+        self.directory = directory
+        self.pattern = pattern
+        self.count = 0
+        self.written = 0
+        self.grab_seconds = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+        self.pbos = None
+        if glMapBuffer and glGenBuffers:
+            self.pbos = glGenBuffers(ring) if ring > 1 else [glGenBuffers(1)]
+            for pbo in self.pbos:
+                glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+                glBufferData(GL_PIXEL_PACK_BUFFER, self.size, None, GL_STREAM_READ)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+            self.held = [None] * len(self.pbos)  # frame number read into each PBO
+
+        self.queue = queue.Queue(maxsize=backlog)  # a slow disk blocks grab() instead of using memory
+        self.worker = threading.Thread(target=self._write_frames, daemon=True)
+        self.worker.start()
+
+    def grab(self):
+        """Read back the frame just drawn (call before swapping buffers)."""
+        t0 = time.perf_counter()
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        if self.pbos is None:
+            pixels = glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE)
+            self.queue.put((self.count, pixels))
+        else:
+            slot = self.count % len(self.pbos)
+            if self.held[slot] is not None:
+                self._collect(slot)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[slot])
+            glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+            self.held[slot] = self.count
+        self.count += 1
+        self.grab_seconds += time.perf_counter() - t0
+
+    def _collect(self, slot):
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[slot])
+        address = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        pixels = ctypes.string_at(address, self.size)
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.queue.put((self.held[slot], pixels))
+        self.held[slot] = None
+
+    def _write_frames(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            number, pixels = item
+            write_png(os.path.join(self.directory, self.pattern % number), self.width, self.height, pixels)
+            self.written += 1
+
+    def close(self):
+        """Collect the frames still in the ring and wait for the writer. Needs the GL context."""
+        if self.pbos is not None:
+            pending = sorted((frame, slot) for slot, frame in enumerate(self.held) if frame is not None)
+            for frame, slot in pending:
+                self._collect(slot)
+            glDeleteBuffers(len(self.pbos), self.pbos)
+            self.pbos = None
+        self.queue.put(None)
+        self.worker.join()
@@ -0,0 +1,55 @@
+import math
+
+from collections import Counter
+
+
+class Frustum:
+    """The six clip planes of a projection * view matrix (row-major, see mesh.py).
+
+    Tests are conservative: something is reported hidden only when it lies
+    entirely outside one plane. Until set_matrix() is called there are no
+    planes and everything is visible. drawn / culled count test results
+    per category since the last set_matrix().
+    """
+
+    def __init__(self):
+        self.planes = []
+        self.drawn = Counter()
+        self.culled = Counter()
+
+    def set_matrix(self, m):
+        r0, r1, r2, r3 = m
+        planes = []
+        for sign, row in ((1, r0), (-1, r0), (1, r1), (-1, r1), (1, r2), (-1, r2)):
+            a, b, c, d = (r3[i] + sign * row[i] for i in range(4))
+            length = math.sqrt(a * a + b * b + c * c)
+            planes.append((a / length, b / length, c / length, d / length))
+        self.planes = planes
+        self.drawn.clear()
+        self.culled.clear()
+
+    def test_sphere(self, category, x, y, z, radius):
+        for a, b, c, d in self.planes:
+            if a * x + b * y + c * z + d < -radius:
+                self.culled[category] += 1
+                return False
+        self.drawn[category] += 1
+        return True
+
+    def test_box(self, category, lo, hi):
+        """Axis-aligned box from corner lo to corner hi."""
+        for a, b, c, d in self.planes:
+            # corner furthest along the plane normal
+            x = hi[0] if a >= 0 else lo[0]
+            y = hi[1] if b >= 0 else lo[1]
+            z = hi[2] if c >= 0 else lo[2]
+            if a * x + b * y + c * z + d < 0:
+                self.culled[category] += 1
+                return False
+        self.drawn[category] += 1
+        return True
+
+    def summary(self):
+        """'category drawn/total' for each category tested."""
+        names = sorted(set(self.drawn) | set(self.culled))
+        return "  ".join("{} {}/{}".format(n, self.drawn[n], self.drawn[n] + self.culled[n]) for n in names)
@@ -0,0 +1,520 @@
+import random
+
+from entities import Bullet, Pool
+from obstacles import OBSTACLE_STORES
+
+
+# World / road
+LANE_OFFSET = 150  # increased for more space between lanes
+NUM_LANES = 3
+
+# Player
+BASE_SPEED = 5.0
+
+# Smooth lane movement (Feature 2.1)
+LANE_LERP_SPEED = 10.0  # bigger = snappier, smaller = smoother
+
+# Feature-7: difficulty/speed progression
+SPEED_RAMP_PER_SEC = 0.025
+SPEED_RAMP_PER_100_POINTS = 0.3  # speed increase per 100 points
+MAX_BASE_SPEED = 20.0  # increased max speed
+BOOST_ADD = 1.8
+
+# Spawning: interval = max(min, start - elapsed * decay), and the share of
+# spawns that are pickups (the rest are cars and barriers, half each)
+SPAWN_INTERVAL_START = 1.0
+SPAWN_INTERVAL_DECAY = 0.02
+SPAWN_INTERVAL_MIN = 0.35  # reduced spawn delay
+CUBE_CHANCE = 0.12
+SHIELD_CHANCE = 0.04
+SPAWN_AHEAD = 800  # spawn this far in front of the player
+SPAWN_SPACING = 400  # minimum z distance between consecutive obstacles
+DESPAWN_BEHIND = 150  # obstacles this far behind the player are removed
+
+# Where obstacles come from: "timer" draws each one when the spawn timer
+# fires, "track" releases them from a seeded track.TrackGenerator
+SPAWNERS = ("timer", "track")
+
+# Feature-8: power-up (Shield)
+SHIELD_DURATION = 8.0
+
+# Feature-7: bonus for destroying enemy vehicles
+ENEMY_DESTROY_BONUS = 50
+
+# Feature-4: crash visual effect
+CRASH_DURATION = 0.6
+
+# Cheat mode - Gun
+BULLET_SPEED = 25.0
+SHOOT_INTERVAL = 0.15
+
+# Fixed timestep: simulation rate and the most wall time one frame may feed
+SIM_HZ = 120
+MAX_FRAME_TIME = 0.25
+
+# Input actions accepted by GameState.step()
+# "left", "right": change target lane
+# "boost", "brake": start / stop boosting
+# "pause", "restart", "cheat": toggles
+ACTIONS = ("left", "right", "boost", "brake", "pause", "restart", "cheat")
+
+
+# Utility
+class Difficulty:
+    """The tunable difficulty knobs; defaults are the constants above.
+
+    Difficulty(max_base_speed=25.0) overrides single values; the names
+    are the lower-case constant names.
+    """
+
+    NAMES = (
+        "speed_ramp_per_sec", "speed_ramp_per_100_points", "max_base_speed",
+        "spawn_interval_start", "spawn_interval_decay", "spawn_interval_min",
+        "cube_chance", "shield_chance",
+    )
+
+    def __init__(self, **overrides):
+        for name in self.NAMES:
+            setattr(self, name, globals()[name.upper()])
+        for name, value in overrides.items():
+            if name not in self.NAMES:
+                raise TypeError("unknown difficulty setting %r" % name)
+            setattr(self, name, value)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.NAMES}
+
+
+def base_speed(elapsed, total_score, difficulty, minimum=min):
+    """Speed without boost after elapsed seconds at total_score.
+
+    minimum is min for numbers; batch_sim passes np.minimum for arrays.
+    """
+    d = difficulty
+    speed = BASE_SPEED + elapsed * d.speed_ramp_per_sec + (total_score / 100.0) * d.speed_ramp_per_100_points
+    return minimum(speed, d.max_base_speed)
+
+
+def spawn_interval(elapsed, difficulty, maximum=max):
+    """Seconds until the next spawn after one at elapsed (maximum as in base_speed)."""
+    d = difficulty
+    return maximum(d.spawn_interval_min, d.spawn_interval_start - elapsed * d.spawn_interval_decay)
+
+
+def pickup_chances(difficulty):
+    """Spawn rolls below these are a cube / a shield (cumulative); the rest are cars and barriers."""
+    d = difficulty
+    return d.cube_chance, d.cube_chance + d.shield_chance
+
+
+def roll_kind(rng, difficulty):
+    """Kind of a new obstacle, drawn from a random.Random."""
+    cube_below, shield_below = pickup_chances(difficulty)
+    r = rng.random()
+    if r < cube_below:
+        return "cube"
+    if r < shield_below:
+        return "shield"
+    return rng.choice(["car", "barrier"])
+
+
+def lane_x(idx):
+    """Mirror lanes so lower index is visually left when camera is behind car."""
+    center = 0.0
+    return center - (idx - 1) * LANE_OFFSET
+
+
+LANE_XS = [lane_x(i) for i in range(NUM_LANES)]
+
+# Bullet hit box: |dx| < BULLET_HIT_X and |dz| < BULLET_HIT_Z
+BULLET_HIT_X = 30
+BULLET_HIT_Z = 40
+BULLET_BUCKET_X = 2 * BULLET_HIT_X  # bucket sizes for the bullet broadphase
+BULLET_BUCKET = 2 * BULLET_HIT_Z
+
+
+NO_BULLET_HITS = (frozenset(), ())
+
+
+def bullet_hits(bullets, hazards):
+    """Broadphase bullet vs obstacle test.
+
+    hazards is a list of (handle, x, z). They are bucketed on an x / z
+    grid as big as the hit box, so each bullet only checks the buckets
+    its hit box overlaps, not every obstacle. Obstacles needn't sit on a
+    lane. Returns (ids of hit bullets, handles of hit obstacles), each
+    obstacle listed once, in hazards order.
+    """
+    if not bullets or not hazards:
+        return NO_BULLET_HITS
+
+    buckets = {}
+    for i, (o, ox, oz) in enumerate(hazards):
+        buckets.setdefault((int(ox // BULLET_BUCKET_X), int(oz // BULLET_BUCKET)), []).append(i)
+
+    hit_bullets = set()
+    hit_obstacles = set()
+    for b in bullets:
+        bx = b.x
+        bz = b.z
+        j_lo = int((bx - BULLET_HIT_X) // BULLET_BUCKET_X)
+        j_hi = int((bx + BULLET_HIT_X) // BULLET_BUCKET_X)
+        k_lo = int((bz - BULLET_HIT_Z) // BULLET_BUCKET)
+        k_hi = int((bz + BULLET_HIT_Z) // BULLET_BUCKET)
+        for j in range(j_lo, j_hi + 1):
+            for k in range(k_lo, k_hi + 1):
+                for i in buckets.get((j, k), ()):
+                    _, ox, oz = hazards[i]
+                    if abs(bx - ox) < BULLET_HIT_X and abs(bz - oz) < BULLET_HIT_Z:
+                        hit_bullets.add(id(b))
+                        hit_obstacles.add(i)
+
+    return hit_bullets, [hazards[i][0] for i in sorted(hit_obstacles)]
+
+
+class GameState:
+    """Whole game simulation, no OpenGL/GLUT needed.
+
+    step(dt, inputs) does what idle() used to do; the renderer only reads
+    the attributes below. obstacle_store picks the container from
+    obstacles.OBSTACLE_STORES: "lanes" (default) or "array" (numpy).
+    difficulty is a Difficulty; None means the defaults. spawner is one of
+    SPAWNERS; track_thread generates the track on a background thread.
+    """
+
+    def __init__(self, seed=None, obstacle_store="lanes", difficulty=None, spawner="timer", track_thread=False):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.difficulty = difficulty or Difficulty()
+        self.obstacles = OBSTACLE_STORES[obstacle_store](LANE_XS)
+        self.spawner = spawner
+        self.track = None
+        if spawner == "track":
+            from track import TrackGenerator
+            self.track = TrackGenerator(seed, self.difficulty, threaded=track_thread)
+        elif spawner != "timer":
+            raise ValueError("unknown spawner %r" % spawner)
+        self.bullet_pool = Pool(Bullet)
+        self.bullets = []
+        self.restart()
+
+    def restart(self):
+        # Player
+        self.player_lane = 1  # target lane: 0,1,2
+        self.player_z = 0.0
+        self.player_x = lane_x(self.player_lane)  # smooth position along X
+        self.player_speed = BASE_SPEED
+        self.is_boosting = False
+
+        # Score / state
+        self.collect_score = 0
+        self.distance_score = 0
+        self.total_score = 0
+        self.game_over = False
+        self.is_paused = False
+
+        # Shield / crash effect
+        self.shield_active = False
+        self.shield_timer = 0.0
+        self.crash_timer = 0.0
+
+        # Obstacles / traffic
+        # kind: "car", "cube", "barrier", "shield"
+        self.obstacles.clear()
+        self.spawn_timer = 0.0
+        self.spawn_interval = 0.8
+        self.elapsed = 0.0  # simulated seconds since (re)start
+        self.track_chunk = 0  # next track mark: index of its chunk and within it
+        self.track_pos = 0
+        self.track_marks = self.track.chunk(0) if self.track else ()
+
+        # Cheat mode - Gun
+        self.cheat_mode = False
+        self.clear_bullets()  # pooled Bullet objects
+        self.shoot_timer = 0.0
+
+        # Previous tick, for render interpolation
+        self.prev_player_x = self.player_x
+        self.prev_player_z = self.player_z
+        self.last_scroll = 0.0  # how far obstacles moved back last tick
+        self.last_bullet_step = 0.0  # how far bullets moved forward last tick
+
+    # Input
+    def apply_input(self, action):
+        if action == "restart":
+            self.restart()
+            return
+
+        if action == "pause":
+            if not self.game_over:
+                self.is_paused = not self.is_paused
+            return
+
+        if self.is_paused:
+            return
+
+        if action == "left":
+            if self.player_lane > 0:
+                self.player_lane -= 1
+        elif action == "right":
+            if self.player_lane < NUM_LANES - 1:
+                self.player_lane += 1
+        elif action == "boost":
+            self.is_boosting = True
+        elif action == "brake":
+            self.is_boosting = False
+        elif action == "cheat":
+            self.cheat_mode = not self.cheat_mode
+            self.clear_bullets()
+            self.shoot_timer = 0.0
+
+    # Loop
+    def step(self, dt, inputs=()):
+        for action in inputs:
+            self.apply_input(action)
+
+        self.prev_player_x = self.player_x
+        self.prev_player_z = self.player_z
+        self.last_scroll = 0.0
+        self.last_bullet_step = 0.0
+
+        self.elapsed += dt
+
+        if self.crash_timer > 0.0:
+            self.crash_timer -= dt
+            if self.crash_timer < 0.0:
+                self.crash_timer = 0.0
+
+        if not self.game_over and not self.is_paused:
+            target_x = lane_x(self.player_lane)
+            t = LANE_LERP_SPEED * dt
+            if t > 1.0:
+                t = 1.0
+            self.player_x = self.player_x + (target_x - self.player_x) * t
+
+            base_now = base_speed(self.elapsed, self.total_score, self.difficulty)
+
+            if self.is_boosting:
+                self.player_speed = base_now + BOOST_ADD
+            else:
+                self.player_speed = base_now
+
+            self.player_z += self.player_speed * 60 * dt
+
+            self.distance_score = int(self.player_z / 35.0)
+            self.total_score = self.distance_score + self.collect_score
+
+            if self.shield_active:
+                self.shield_timer -= dt
+                if self.shield_timer <= 0.0:
+                    self.shield_timer = 0.0
+                    self.shield_active = False
+
+        self.update_obstacles(dt)
+
+        # Cheat mode updates
+        self.auto_shoot(dt)
+        self.update_bullets(dt)
+
+    def interpolate(self, alpha):
+        """Render positions a fraction alpha of the way from the previous tick.
+
+        Returns (player_x, player_z, obstacle_z_shift, bullet_z_shift); the
+        shifts are added to every obstacle / bullet z.
+        """
+        x = self.prev_player_x + (self.player_x - self.prev_player_x) * alpha
+        z = self.prev_player_z + (self.player_z - self.prev_player_z) * alpha
+        back = 1.0 - alpha
+        return x, z, self.last_scroll * back, -self.last_bullet_step * back
+
+    # Obstacles / traffic
+    def spawn_obstacle(self):
+        # Don't spawn if there's already an obstacle too close in any lane
+        z_spawn = self.player_z + SPAWN_AHEAD
+        if self.obstacles.any_near(z_spawn, SPAWN_SPACING):
+            return
+
+        # Equal probability for all lanes
+        lane = self.rng.randint(0, NUM_LANES - 1)
+        self.obstacles.add(lane, z_spawn, roll_kind(self.rng, self.difficulty))
+
+        self.spawn_interval = spawn_interval(self.elapsed, self.difficulty)
+
+    def release_track(self):
+        """Add the track obstacles whose marks the player has passed.
+
+        Each is placed where it would be had it spawned exactly at its
+        mark, so the track doesn't depend on the tick rate: an obstacle
+        is met at its mark + SPAWN_AHEAD / 2 whatever the speed.
+        """
+        marks = self.track_marks
+        while True:
+            if self.track_pos == len(marks):
+                self.track_chunk += 1
+                self.track_pos = 0
+                self.track_marks = marks = self.track.chunk(self.track_chunk)
+                continue
+            mark, lane, kind = marks[self.track_pos]
+            if mark > self.player_z:
+                return
+            self.obstacles.add(lane, 2 * mark + SPAWN_AHEAD - self.player_z, kind)
+            self.track_pos += 1
+            self.spawn_interval = spawn_interval(self.elapsed, self.difficulty)
+
+    def update_obstacles(self, dt):
+        if self.game_over or self.is_paused:
+            return
+
+        self.last_scroll = self.player_speed * 60 * dt
+        self.obstacles.advance(self.last_scroll)
+        self.obstacles.despawn_behind(self.player_z - DESPAWN_BEHIND)
+
+        # Hits come back in spawn order; cars/barriers are skipped in cheat mode
+        for o, kind in self.obstacles.player_hits(self.player_x, self.player_z, self.cheat_mode):
+            if kind == "cube":
+                self.collect_score += 10
+                self.obstacles.remove((o,))
+
+            elif kind == "shield":
+                self.shield_active = True
+                self.shield_timer = SHIELD_DURATION
+                self.obstacles.remove((o,))
+
+            elif self.shield_active:
+                self.shield_active = False
+                self.shield_timer = 0.0
+                self.collect_score += ENEMY_DESTROY_BONUS
+                self.obstacles.remove((o,))
+
+            else:
+                self.game_over = True
+                self.crash_timer = CRASH_DURATION
+                # the crashed-into obstacle stays; later ones were never reached
+                self.obstacles.truncate_after(o)
+                break
+
+        if self.game_over:
+            return
+
+        if self.track is not None:
+            self.release_track()
+            return
+
+        self.spawn_timer += dt
+        if self.spawn_timer >= self.spawn_interval:
+            self.spawn_timer = 0.0
+            self.spawn_obstacle()
+
+    # Cheat Mode - Gun & Bullets
+    def clear_bullets(self):
+        self.bullet_pool.release_all(self.bullets)
+        self.bullets.clear()
+
+    def update_bullets(self, dt):
+        """Update bullet positions and check collisions with obstacles"""
+        if not self.cheat_mode:
+            return
+
+        # Move bullets forward, compacting the list in place
+        self.last_bullet_step = step = BULLET_SPEED * 60 * dt
+        limit = self.player_z + 1000
+        bullets = self.bullets
+        kept = 0
+        for b in bullets:
+            b.z += step
+
+            # Remove bullets that are too far ahead
+            if b.z < limit:
+                bullets[kept] = b
+                kept += 1
+            else:
+                self.bullet_pool.release(b)
+        del bullets[kept:]
+
+        # Check bullet-obstacle collisions
+        # Only shoot cars and barriers, not collectibles
+        if not bullets or not len(self.obstacles):
+            return
+        hit_bullets, hit_obstacles = bullet_hits(bullets, self.obstacles.hazards())
+        self.collect_score += 25 * len(hit_obstacles)  # bonus for destroying with gun
+
+        # Remove hit bullets and obstacles
+        if hit_bullets:
+            kept = 0
+            for b in bullets:
+                if id(b) in hit_bullets:
+                    self.bullet_pool.release(b)
+                else:
+                    bullets[kept] = b
+                    kept += 1
+            del bullets[kept:]
+        self.obstacles.remove(hit_obstacles)
+
+    def auto_shoot(self, dt):
+        """Automatically shoot bullets when cheat mode is active"""
+        if not self.cheat_mode or self.game_over or self.is_paused:
+            return
+
+        self.shoot_timer += dt
+        if self.shoot_timer >= SHOOT_INTERVAL:
+            self.shoot_timer = 0.0
+            # Create new bullet at player position
+            b = self.bullet_pool.acquire()
+            b.x = self.player_x
+            b.z = self.player_z + 50
+            self.bullets.append(b)
+
+
+class FixedStepper:
+    """Feeds variable frame times to a GameState as fixed-size ticks.
+
+    Leftover time stays in the accumulator; alpha tells the renderer how
+    far it is between the last two ticks.
+    """
+
+    def __init__(self, state, hz=SIM_HZ, max_frame_time=MAX_FRAME_TIME):
+        self.state = state
+        self.tick = 1.0 / hz
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.ticks = 0
+        self.pending = []  # input actions waiting for the next tick
+        self.recorder = None  # called as recorder(tick, inputs) for ticks with input
+        self.playback = None  # {tick: inputs}; replaces pending when set
+        self.max_ticks = None  # stop stepping after this many ticks
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.pending = []
+
+    def advance(self, frame_dt, time_scale=1.0):
+        """Run as many ticks as frame_dt covers; returns the number run.
+
+        frame_dt is game time; time_scale is the game time per real second
+        it was scaled by, so max_frame_time limits the real frame time.
+        """
+        limit = self.max_frame_time * time_scale
+        if frame_dt > limit:
+            frame_dt = limit  # drop time rather than spiral
+        self.accumulator += frame_dt
+
+        steps = 0
+        while self.accumulator >= self.tick:
+            if self.max_ticks is not None and self.ticks >= self.max_ticks:
+                self.accumulator = 0.0
+                break
+            inputs = self.pending
+            self.pending = []
+            if self.playback is not None:
+                inputs = self.playback.get(self.ticks, ())
+            if inputs and self.recorder is not None:
+                self.recorder(self.ticks, inputs)
+            self.state.step(self.tick, inputs)
+            self.accumulator -= self.tick
+            self.ticks += 1
+            steps += 1
+
+        self.alpha = self.accumulator / self.tick
+        return steps
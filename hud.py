@@ -0,0 +1,177 @@
+import ctypes
+
+from OpenGL.GL import *
+from OpenGL.GLU import *
+from OpenGL.GLUT import *
+
+from instancing import float_array
+
+
+# Atlas layout: printable ASCII in a grid of fixed cells
+FIRST_CHAR, LAST_CHAR = 32, 126
+CELL_W, CELL_H = 24, 24
+COLUMNS = 16
+PAD_X = 2      # room for glyphs that start left of the pen position
+BASELINE = 6   # pixels from the bottom of a cell to the text baseline
+ATLAS_W, ATLAS_H = 512, 256
+
+
+class GlyphAtlas:
+    """A GLUT bitmap font rendered once into a texture (needs framebuffer objects)."""
+
+    def __init__(self, font):
+        self.widths = {c: glutBitmapWidth(font, c) for c in range(FIRST_CHAR, LAST_CHAR + 1)}
+
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, ATLAS_W, ATLAS_H, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.texture, 0)
+        try:
+            if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+                raise RuntimeError("glyph atlas framebuffer incomplete")
+            self._render_glyphs(font)
+        finally:
+            glBindFramebuffer(GL_FRAMEBUFFER, 0)
+            glDeleteFramebuffers(1, [fbo])
+
+    def _render_glyphs(self, font):
+        glPushAttrib(GL_ALL_ATTRIB_BITS)
+        glViewport(0, 0, ATLAS_W, ATLAS_H)
+        glClearColor(0.0, 0.0, 0.0, 0.0)
+        glClear(GL_COLOR_BUFFER_BIT)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, ATLAS_W, 0, ATLAS_H)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        for c in range(FIRST_CHAR, LAST_CHAR + 1):
+            x, y = self.cell(c)
+            glRasterPos2f(x + PAD_X, y + BASELINE)
+            glutBitmapCharacter(font, c)
+
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+
+    def cell(self, c):
+        i = c - FIRST_CHAR
+        return (i % COLUMNS) * CELL_W, (i // COLUMNS) * CELL_H
+
+    def layout(self, x, y, text):
+        """Quads for text with its baseline starting at (x, y): [x, y, u, v] * 4 per char."""
+        data = []
+        for ch in text:
+            c = ord(ch)
+            if c not in self.widths:
+                c = ord("?")
+            cx, cy = self.cell(c)
+            x0 = x - PAD_X
+            y0 = y - BASELINE
+            u0, v0 = cx / ATLAS_W, cy / ATLAS_H
+            u1, v1 = (cx + CELL_W) / ATLAS_W, (cy + CELL_H) / ATLAS_H
+            data.extend((
+                x0, y0, u0, v0,
+                x0 + CELL_W, y0, u1, v0,
+                x0 + CELL_W, y0 + CELL_H, u1, v1,
+                x0, y0 + CELL_H, u0, v1,
+            ))
+            x += self.widths[c]
+        return data
+
+
+class HudText:
+    """Screen text drawn from a GlyphAtlas in one batched call.
+
+    Each frame, show() every line that should be visible. A line's quads
+    are rebuilt only when its position, format or values change, and the
+    vertex buffer is re-uploaded only when some line did.
+    """
+
+    def __init__(self, atlas):
+        self.atlas = atlas
+        self.lines = {}    # key -> (x, y, fmt, values)
+        self.quads = {}    # key -> vertex data for that line
+        self.shown = []    # keys shown this frame, in order
+        self.drawn = []    # keys currently in the vertex buffer
+        self.vbo = glGenBuffers(1)
+        self.vertex_count = 0
+        self.rebuilds = 0  # lines re-laid out, for profiling
+
+    def show(self, key, x, y, fmt, *values):
+        line = (x, y, fmt, values)
+        if self.lines.get(key) != line:
+            self.lines[key] = line
+            self.quads[key] = self.atlas.layout(x, y, fmt.format(*values) if values else fmt)
+            self.rebuilds += 1
+            self.drawn = None  # force upload
+        self.shown.append(key)
+
+    def _upload(self):
+        data = []
+        for key in self.shown:
+            data.extend(self.quads[key])
+        self.vertex_count = len(data) // 4
+        if data:
+            array = float_array(data)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, ctypes.sizeof(array), array, GL_DYNAMIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.drawn = self.shown
+
+    def draw(self, width, height):
+        if self.shown != self.drawn:
+            self._upload()
+        self.shown = []
+        if not self.vertex_count:
+            return
+
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, width, 0, height)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_TEXTURE_2D)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glBindTexture(GL_TEXTURE_2D, self.atlas.texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+        glColor3f(1, 1, 1)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 16, ctypes.c_void_p(0))
+        glTexCoordPointer(2, GL_FLOAT, 16, ctypes.c_void_p(8))
+        glDrawArrays(GL_QUADS, 0, self.vertex_count)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glPopAttrib()
+
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
@@ -0,0 +1,144 @@
+import ctypes
+
+from OpenGL.GL import *
+
+from mesh import VERTEX_FLOATS, column_major, identity
+
+
+IDENTITY = column_major(identity())
+
+
+# Compatibility-profile shader: reads the fixed-function camera matrices and
+# GL_LIGHT0 so instanced models match the rest of the scene.
+VERTEX_SHADER = """
+#version 120
+attribute vec3 a_position;
+attribute vec3 a_normal;
+attribute vec3 a_color;
+attribute vec3 a_offset;
+uniform mat4 u_model;
+varying vec3 v_color;
+
+void main() {
+    vec4 world = u_model * vec4(a_position, 1.0) + vec4(a_offset, 0.0);
+    vec4 eye = gl_ModelViewMatrix * world;
+    gl_Position = gl_ProjectionMatrix * eye;
+
+    if (dot(a_normal, a_normal) == 0.0) {
+        v_color = a_color;  // unlit part
+    } else {
+        vec3 n = normalize(gl_NormalMatrix * (mat3(u_model) * a_normal));
+        vec3 l = normalize(gl_LightSource[0].position.xyz - eye.xyz);
+        float diffuse = max(dot(n, l), 0.0);
+        v_color = a_color * (gl_LightModel.ambient.rgb + gl_LightSource[0].ambient.rgb
+                             + gl_LightSource[0].diffuse.rgb * diffuse);
+    }
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec3 v_color;
+
+void main() {
+    gl_FragColor = vec4(v_color, 1.0);
+}
+"""
+
+ATTRIBUTES = ("a_position", "a_normal", "a_color", "a_offset")
+_program = None
+
+
+def instancing_supported():
+    return bool(glDrawArraysInstanced) and bool(glVertexAttribDivisor) and bool(glCreateShader)
+
+
+def compile_shader(kind, source):
+    shader = glCreateShader(kind)
+    glShaderSource(shader, source)
+    glCompileShader(shader)
+    if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+        raise RuntimeError(glGetShaderInfoLog(shader))
+    return shader
+
+
+def link_program(vertex_source, fragment_source, attributes=()):
+    """Compile and link a shader program; attributes are bound to locations 0, 1, ..."""
+    program = glCreateProgram()
+    glAttachShader(program, compile_shader(GL_VERTEX_SHADER, vertex_source))
+    glAttachShader(program, compile_shader(GL_FRAGMENT_SHADER, fragment_source))
+    for location, name in enumerate(attributes):
+        glBindAttribLocation(program, location, name)
+    glLinkProgram(program)
+    if not glGetProgramiv(program, GL_LINK_STATUS):
+        raise RuntimeError(glGetProgramInfoLog(program))
+    return program
+
+
+def get_program():
+    """Build the shared instancing program once."""
+    global _program
+    if _program is None:
+        _program = link_program(VERTEX_SHADER, FRAGMENT_SHADER, ATTRIBUTES)
+    return _program
+
+
+def float_array(values):
+    return (GLfloat * len(values))(*values)
+
+
+def upload(buffer_id, values, usage):
+    data = float_array(values)
+    glBindBuffer(GL_ARRAY_BUFFER, buffer_id)
+    glBufferData(GL_ARRAY_BUFFER, ctypes.sizeof(data), data, usage)
+
+
+class InstancedMesh:
+    """One model in a VBO, drawn for many offsets with one call per primitive type."""
+
+    def __init__(self, mesh):
+        self.program = get_program()
+        self.u_model = glGetUniformLocation(self.program, "u_model")
+        self.tri_vertices = len(mesh.tris) // VERTEX_FLOATS
+        self.line_vertices = len(mesh.lines) // VERTEX_FLOATS
+        self.mesh_vbo, self.instance_vbo = glGenBuffers(2)
+        # triangles first, lines right after them in the same buffer
+        upload(self.mesh_vbo, mesh.tris + mesh.lines, GL_STATIC_DRAW)
+        self.instance_count = 0
+
+    def set_instances(self, offsets):
+        """offsets: flat [x, y, z, x, y, z, ...] list, one triple per instance."""
+        self.instance_count = len(offsets) // 3
+        if self.instance_count:
+            upload(self.instance_vbo, offsets, GL_STREAM_DRAW)
+
+    def draw(self, model=None):
+        """model: column-major matrix (mesh.column_major) applied before the offsets."""
+        if not self.instance_count:
+            return
+
+        glUseProgram(self.program)
+        glUniformMatrix4fv(self.u_model, 1, GL_FALSE, model or IDENTITY)
+
+        stride = VERTEX_FLOATS * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_vbo)
+        for location, offset in ((0, 0), (1, 12), (2, 24)):
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset))
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glEnableVertexAttribArray(3)
+        glVertexAttribPointer(3, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+        glVertexAttribDivisor(3, 1)
+
+        if self.tri_vertices:
+            glDrawArraysInstanced(GL_TRIANGLES, 0, self.tri_vertices, self.instance_count)
+        if self.line_vertices:
+            glLineWidth(2.0)
+            glDrawArraysInstanced(GL_LINES, self.tri_vertices, self.line_vertices, self.instance_count)
+
+        glVertexAttribDivisor(3, 0)
+        for location in range(4):
+            glDisableVertexAttribArray(location)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
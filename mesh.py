@@ -0,0 +1,260 @@
+import math
+
+# Enum values from OpenGL.GL; spelled out so mesh.py imports without OpenGL
+GL_TRIANGLES = 0x0004
+GL_QUADS = 0x0007
+GL_LIGHTING = 0x0B50
+
+
+# Vertex layout used by every mesh: x, y, z, nx, ny, nz, r, g, b
+# A zero normal marks an unlit vertex (drawn with glDisable(GL_LIGHTING)).
+VERTEX_FLOATS = 9
+
+
+# 4x4 matrices, row-major nested lists
+def identity():
+    return [[1.0, 0.0, 0.0, 0.0],
+            [0.0, 1.0, 0.0, 0.0],
+            [0.0, 0.0, 1.0, 0.0],
+            [0.0, 0.0, 0.0, 1.0]]
+
+
+def mat_mul(a, b):
+    return [[sum(a[i][k] * b[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+
+
+def translation(x, y, z):
+    m = identity()
+    m[0][3], m[1][3], m[2][3] = x, y, z
+    return m
+
+
+def scaling(x, y, z):
+    m = identity()
+    m[0][0], m[1][1], m[2][2] = x, y, z
+    return m
+
+
+def rotation(angle, x, y, z):
+    """Same matrix as glRotatef(angle, x, y, z)."""
+    length = math.sqrt(x * x + y * y + z * z)
+    if length == 0.0:
+        return identity()
+    x, y, z = x / length, y / length, z / length
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    t = 1.0 - c
+    return [[x * x * t + c, x * y * t - z * s, x * z * t + y * s, 0.0],
+            [y * x * t + z * s, y * y * t + c, y * z * t - x * s, 0.0],
+            [z * x * t - y * s, z * y * t + x * s, z * z * t + c, 0.0],
+            [0.0, 0.0, 0.0, 1.0]]
+
+
+def perspective(fovy, aspect, near, far):
+    """Same matrix as gluPerspective(fovy, aspect, near, far)."""
+    f = 1.0 / math.tan(math.radians(fovy) / 2.0)
+    return [[f / aspect, 0.0, 0.0, 0.0],
+            [0.0, f, 0.0, 0.0],
+            [0.0, 0.0, (far + near) / (near - far), 2.0 * far * near / (near - far)],
+            [0.0, 0.0, -1.0, 0.0]]
+
+
+def look_at(eye, center, up):
+    """Same matrix as gluLookAt(*eye, *center, *up)."""
+    fx, fy, fz = center[0] - eye[0], center[1] - eye[1], center[2] - eye[2]
+    length = math.sqrt(fx * fx + fy * fy + fz * fz)
+    fx, fy, fz = fx / length, fy / length, fz / length
+    ux, uy, uz = up
+    sx, sy, sz = fy * uz - fz * uy, fz * ux - fx * uz, fx * uy - fy * ux
+    length = math.sqrt(sx * sx + sy * sy + sz * sz)
+    sx, sy, sz = sx / length, sy / length, sz / length
+    ux, uy, uz = sy * fz - sz * fy, sz * fx - sx * fz, sx * fy - sy * fx
+    m = [[sx, sy, sz, 0.0],
+         [ux, uy, uz, 0.0],
+         [-fx, -fy, -fz, 0.0],
+         [0.0, 0.0, 0.0, 1.0]]
+    return mat_mul(m, translation(-eye[0], -eye[1], -eye[2]))
+
+
+def transform_point(m, x, y, z):
+    return (m[0][0] * x + m[0][1] * y + m[0][2] * z + m[0][3],
+            m[1][0] * x + m[1][1] * y + m[1][2] * z + m[1][3],
+            m[2][0] * x + m[2][1] * y + m[2][2] * z + m[2][3])
+
+
+def column_major(m):
+    """Flatten for glUniformMatrix4fv / glLoadMatrixf."""
+    return [m[i][j] for j in range(4) for i in range(4)]
+
+
+def face_normal(a, b, c):
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+    length = math.sqrt(nx * nx + ny * ny + nz * nz)
+    if length == 0.0:
+        return (0.0, 1.0, 0.0)
+    return (nx / length, ny / length, nz / length)
+
+
+# Unit cube corners and faces (counter-clockwise seen from outside)
+CUBE_CORNERS = [(x, y, z) for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)]
+CUBE_FACES = [
+    (0, 1, 3, 2),  # -x
+    (4, 6, 7, 5),  # +x
+    (0, 4, 5, 1),  # -y
+    (2, 3, 7, 6),  # +y
+    (0, 2, 6, 4),  # -z
+    (1, 5, 7, 3),  # +z
+]
+CUBE_EDGES = [(0, 1), (1, 3), (3, 2), (2, 0),
+               (4, 5), (5, 7), (7, 6), (6, 4),
+               (0, 4), (1, 5), (2, 6), (3, 7)]
+
+
+class Mesh:
+    def __init__(self):
+        self.tris = []   # VERTEX_FLOATS per vertex, 3 vertices per triangle
+        self.lines = []  # VERTEX_FLOATS per vertex, 2 vertices per line
+
+    def triangle_count(self):
+        return len(self.tris) // (VERTEX_FLOATS * 3)
+
+    def line_count(self):
+        return len(self.lines) // (VERTEX_FLOATS * 2)
+
+    def bounds(self):
+        """(min_xyz, max_xyz) over all vertices."""
+        data = self.tris + self.lines
+        xs = data[0::VERTEX_FLOATS]
+        ys = data[1::VERTEX_FLOATS]
+        zs = data[2::VERTEX_FLOATS]
+        if not xs:
+            return (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)
+        return (min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs))
+
+
+class MeshRecorder:
+    """Stand-in for the GL/GLUT calls our model functions use.
+
+    Instead of drawing, every solid cube and quad is transformed on the
+    CPU and appended to a Mesh, so the existing draw_*() functions stay
+    the single definition of each model.
+    """
+
+    def __init__(self):
+        self.mesh = Mesh()
+        self.stack = [identity()]
+        self.color = (1.0, 1.0, 1.0)
+        self.lighting = True
+        self.mode = None
+        self.pending = []
+
+    # Matrix stack
+    def glPushMatrix(self):
+        self.stack.append([row[:] for row in self.stack[-1]])
+
+    def glPopMatrix(self):
+        self.stack.pop()
+
+    def glTranslatef(self, x, y, z):
+        self.stack[-1] = mat_mul(self.stack[-1], translation(x, y, z))
+
+    def glScalef(self, x, y, z):
+        self.stack[-1] = mat_mul(self.stack[-1], scaling(x, y, z))
+
+    def glRotatef(self, angle, x, y, z):
+        self.stack[-1] = mat_mul(self.stack[-1], rotation(angle, x, y, z))
+
+    # State
+    def glColor3f(self, r, g, b):
+        self.color = (r, g, b)
+
+    def glColor4f(self, r, g, b, a):
+        self.color = (r, g, b)
+
+    def glEnable(self, cap):
+        if cap == GL_LIGHTING:
+            self.lighting = True
+
+    def glDisable(self, cap):
+        if cap == GL_LIGHTING:
+            self.lighting = False
+
+    def glLineWidth(self, width):
+        pass
+
+    # Geometry
+    def _emit_triangle(self, a, b, c):
+        n = face_normal(a, b, c) if self.lighting else (0.0, 0.0, 0.0)
+        for p in (a, b, c):
+            self.mesh.tris.extend((p[0], p[1], p[2], n[0], n[1], n[2]) + self.color)
+
+    def glBegin(self, mode):
+        self.mode = mode
+        self.pending = []
+
+    def glVertex3f(self, x, y, z):
+        self.pending.append(transform_point(self.stack[-1], x, y, z))
+        if self.mode == GL_QUADS and len(self.pending) == 4:
+            a, b, c, d = self.pending
+            self._emit_triangle(a, b, c)
+            self._emit_triangle(a, c, d)
+            self.pending = []
+        elif self.mode == GL_TRIANGLES and len(self.pending) == 3:
+            self._emit_triangle(*self.pending)
+            self.pending = []
+
+    def glEnd(self):
+        self.mode = None
+        self.pending = []
+
+    def _cube_corners(self, size):
+        m = self.stack[-1]
+        return [transform_point(m, x * size, y * size, z * size) for x, y, z in CUBE_CORNERS]
+
+    def glutSolidCube(self, size):
+        corners = self._cube_corners(size)
+        for a, b, c, d in CUBE_FACES:
+            self._emit_triangle(corners[a], corners[b], corners[c])
+            self._emit_triangle(corners[a], corners[c], corners[d])
+
+    def glutWireCube(self, size):
+        corners = self._cube_corners(size)
+        for a, b in CUBE_EDGES:
+            for p in (corners[a], corners[b]):
+                self.mesh.lines.extend((p[0], p[1], p[2], 0.0, 0.0, 0.0) + self.color)
+
+
+RECORDED_CALLS = (
+    "glPushMatrix", "glPopMatrix", "glTranslatef", "glScalef", "glRotatef",
+    "glColor3f", "glColor4f", "glEnable", "glDisable", "glLineWidth",
+    "glBegin", "glEnd", "glVertex3f", "glutSolidCube", "glutWireCube",
+)
+
+# GL enums the model functions pass to those calls, so they can be
+# recorded before OpenGL is imported
+RECORDED_CONSTANTS = {"GL_TRIANGLES": GL_TRIANGLES, "GL_QUADS": GL_QUADS, "GL_LIGHTING": GL_LIGHTING}
+
+
+def record_mesh(builder, *args):
+    """Run an immediate-mode model function and return its geometry as a Mesh.
+
+    Needs no GL context, nor OpenGL imported in the builder's module.
+    """
+    namespace = builder.__globals__
+    recorder = MeshRecorder()
+    replaced = RECORDED_CALLS + tuple(RECORDED_CONSTANTS)
+    saved = {name: namespace[name] for name in replaced if name in namespace}
+    try:
+        for name in RECORDED_CALLS:
+            namespace[name] = getattr(recorder, name)
+        namespace.update(RECORDED_CONSTANTS)
+        builder(*args)
+    finally:
+        for name in replaced:
+            if name in saved:
+                namespace[name] = saved[name]
+            else:
+                namespace.pop(name, None)  # absent before: don't leave a stand-in behind
+    return recorder.mesh
@@ -0,0 +1,302 @@
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+from entities import Obstacle, Pool
+
+np = None  # imported by ObstacleArrays, the only store that needs numpy
+
+
+KINDS = ("car", "barrier", "cube", "shield")
+HAZARDS = ("car", "barrier")
+
+# (player half w, half h, obstacle half w, half h) per kind
+HIT_BOXES = {
+    "cube": (12, 25, 8, 8),  # tighter collection box
+    "shield": (12, 25, 10, 10),  # tighter collection box
+    "car": (20, 35, 22, 35),  # reduced player/obstacle hitbox
+    "barrier": (20, 35, 22, 35),
+}
+
+# Widest reach of any hit box, for narrowing lookups before the exact test
+MAX_HIT_X = max(pw + ow for pw, ph, ow, oh in HIT_BOXES.values())
+MAX_HIT_Z = max(ph + oh for pw, ph, ow, oh in HIT_BOXES.values())
+
+
+def has_collided(x1, z1, w1, h1, x2, z2, w2, h2):
+    return (
+        x1 - w1 < x2 + w2 and
+        x1 + w1 > x2 - w2 and
+        z1 - h1 < z2 + h2 and
+        z1 + h1 > z2 - h2
+    )
+
+
+class ObstacleLanes:
+    """Obstacles indexed per lane, each lane kept sorted by z.
+
+    Every obstacle moves by the same amount each tick, so instead of
+    rewriting every z we keep a running scroll and store key = z + scroll
+    at spawn time (z is key - scroll). New obstacles usually spawn ahead of
+    all others, so keys mostly arrive in order and lanes stay sorted by
+    appending; an out-of-order add() falls back to a bisect insert.
+    Spawn spacing, despawn and near-player lookups are then a bisect or a
+    popleft per lane instead of a scan over everything.
+
+    Handles are pooled Obstacle objects; seq is the spawn order.
+    """
+
+    def __init__(self, lane_xs):
+        self.lane_xs = lane_xs
+        self.pool = Pool(Obstacle)
+        self.keys = [deque() for _ in lane_xs]
+        self.entries = [deque() for _ in lane_xs]
+        self.clear()
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        for keys, entries in zip(self.keys, self.entries):
+            self.pool.release_all(entries)
+            keys.clear()
+            entries.clear()
+        self.scroll = 0.0
+        self.count = 0
+        self.next_seq = 0
+
+    def add(self, lane, z, kind):
+        o = self.pool.acquire()
+        o.key = key = z + self.scroll
+        o.kind = kind
+        o.seq = self.next_seq
+        o.lane = lane
+        self.next_seq += 1
+        keys = self.keys[lane]
+        if not keys or key >= keys[-1]:
+            keys.append(key)
+            self.entries[lane].append(o)
+        else:
+            i = bisect_right(keys, key)
+            keys.insert(i, key)
+            self.entries[lane].insert(i, o)
+        self.count += 1
+
+    def items(self):
+        """(lane, z, kind) for every live obstacle."""
+        scroll = self.scroll
+        return [(o.lane, o.key - scroll, o.kind) for lane in self.entries for o in lane]
+
+    def any_near(self, z, distance):
+        key = z + self.scroll
+        for keys in self.keys:
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] - key < distance:
+                return True
+            if i > 0 and key - keys[i - 1] < distance:
+                return True
+        return False
+
+    def _range(self, lane, z_min, z_max):
+        keys = self.keys[lane]
+        return bisect_right(keys, z_min + self.scroll), bisect_left(keys, z_max + self.scroll)
+
+    def advance(self, dz):
+        self.scroll += dz
+
+    def despawn_behind(self, z_min):
+        key_min = z_min + self.scroll
+        release = self.pool.release
+        for keys, entries in zip(self.keys, self.entries):
+            while keys and keys[0] <= key_min:
+                keys.popleft()
+                release(entries.popleft())
+                self.count -= 1
+
+    def player_hits(self, px, pz, skip_hazards=False):
+        """(handle, kind) of every obstacle touching the player, in spawn order."""
+        hits = None
+        for lane, ox in enumerate(self.lane_xs):
+            if abs(ox - px) >= MAX_HIT_X:
+                continue
+            lo, hi = self._range(lane, pz - MAX_HIT_Z, pz + MAX_HIT_Z)
+            entries = self.entries[lane]
+            for i in range(lo, hi):
+                o = entries[i]
+                kind = o.kind
+                if skip_hazards and kind in HAZARDS:
+                    continue
+                pw, ph, ow, oh = HIT_BOXES[kind]
+                if has_collided(px, pz, pw, ph, ox, o.key - self.scroll, ow, oh):
+                    if hits is None:
+                        hits = []
+                    hits.append(o)
+        if hits is None:
+            return ()
+        hits.sort(key=lambda o: o.seq)
+        return [(o, o.kind) for o in hits]
+
+    def hazards(self):
+        """(handle, x, z) of every car / barrier."""
+        scroll = self.scroll
+        return [(o, self.lane_xs[o.lane], o.key - scroll)
+                for lane in self.entries for o in lane if o.kind in HAZARDS]
+
+    def _remove_entry(self, o):
+        keys = self.keys[o.lane]
+        entries = self.entries[o.lane]
+        i = bisect_left(keys, o.key)
+        while entries[i] is not o:
+            i += 1
+        del keys[i]
+        del entries[i]
+        self.count -= 1
+        self.pool.release(o)
+
+    def remove(self, handles):
+        for o in handles:
+            self._remove_entry(o)
+
+    def truncate_after(self, handle):
+        """Drop everything spawned after handle. add() may be called out of
+        z order, so later spawns can sit anywhere in a lane, not just at
+        its far end."""
+        seq = handle.seq
+        release = self.pool.release
+        for lane, entries in enumerate(self.entries):
+            if not any(o.seq > seq for o in entries):
+                continue
+            kept = deque()
+            for o in entries:
+                if o.seq > seq:
+                    release(o)
+                    self.count -= 1
+                else:
+                    kept.append(o)
+            self.entries[lane] = kept
+            self.keys[lane] = deque(o.key for o in kept)
+
+
+def kind_arrays():
+    """numpy tables indexed by kind code (position in KINDS): collision
+    extents ext_x and ext_z (a hit is |dx| < ext_x and |dz| < ext_z) and
+    is_hazard. Shared by ObstacleArrays and batch_sim.BatchSim."""
+    import numpy
+    ext_x = numpy.array([HIT_BOXES[k][0] + HIT_BOXES[k][2] for k in KINDS], dtype=numpy.float64)
+    ext_z = numpy.array([HIT_BOXES[k][1] + HIT_BOXES[k][3] for k in KINDS], dtype=numpy.float64)
+    is_hazard = numpy.array([k in HAZARDS for k in KINDS])
+    return ext_x, ext_z, is_hazard
+
+
+class ObstacleArrays:
+    """Structure-of-arrays obstacle store; per-tick work is numpy array ops.
+
+    Rows [0, count) are in spawn order. Handles are row indices and stay
+    valid until the next despawn_behind(), which compacts the arrays.
+    """
+
+    def __init__(self, lane_xs, capacity=64):
+        global np
+        if np is None:
+            try:
+                import numpy as np
+            except ImportError:
+                raise RuntimeError("the array obstacle store needs numpy") from None
+        self.lane_xs = np.array(lane_xs, dtype=np.float64)
+        self.count = 0
+        self.dirty = False
+        self._allocate(capacity)
+
+        self.ext_x, self.ext_z, self.is_hazard = kind_arrays()
+
+    def _allocate(self, capacity):
+        old = self.count
+        lane = np.zeros(capacity, dtype=np.int8)
+        x = np.zeros(capacity, dtype=np.float64)
+        z = np.zeros(capacity, dtype=np.float64)
+        kind = np.zeros(capacity, dtype=np.int8)
+        alive = np.zeros(capacity, dtype=bool)
+        if old:
+            lane[:old] = self.lane[:old]
+            x[:old] = self.x[:old]
+            z[:old] = self.z[:old]
+            kind[:old] = self.kind[:old]
+            alive[:old] = self.alive[:old]
+        self.lane, self.x, self.z, self.kind, self.alive = lane, x, z, kind, alive
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive[:self.count]))
+
+    def clear(self):
+        self.count = 0
+        self.dirty = False
+
+    def add(self, lane, z, kind):
+        if self.count == len(self.z):
+            self._allocate(len(self.z) * 2)
+        i = self.count
+        self.lane[i] = lane
+        self.x[i] = self.lane_xs[lane]
+        self.z[i] = z
+        self.kind[i] = KINDS.index(kind)
+        self.alive[i] = True
+        self.count += 1
+
+    def items(self):
+        n = self.count
+        live = self.alive[:n]
+        lanes = self.lane[:n][live].tolist()
+        zs = self.z[:n][live].tolist()
+        kinds = [KINDS[k] for k in self.kind[:n][live].tolist()]
+        return list(zip(lanes, zs, kinds))
+
+    def any_near(self, z, distance):
+        n = self.count
+        return bool(np.any(self.alive[:n] & (np.abs(self.z[:n] - z) < distance)))
+
+    def advance(self, dz):
+        self.z[:self.count] -= dz
+
+    def _compact(self, keep):
+        rows = np.flatnonzero(keep)
+        m = len(rows)
+        for a in (self.lane, self.x, self.z, self.kind, self.alive):
+            a[:m] = a[rows]
+        self.count = m
+        self.dirty = False
+
+    def despawn_behind(self, z_min):
+        n = self.count
+        keep = self.alive[:n] & (self.z[:n] > z_min)
+        if self.dirty or not keep.all():
+            self._compact(keep)
+
+    def player_hits(self, px, pz, skip_hazards=False):
+        n = self.count
+        kind = self.kind[:n]
+        mask = self.alive[:n].copy()
+        if skip_hazards:
+            mask &= ~self.is_hazard[kind]
+        mask &= np.abs(self.x[:n] - px) < self.ext_x[kind]
+        mask &= np.abs(self.z[:n] - pz) < self.ext_z[kind]
+        rows = np.flatnonzero(mask).tolist()
+        return [(i, KINDS[self.kind[i]]) for i in rows]
+
+    def hazards(self):
+        n = self.count
+        rows = np.flatnonzero(self.alive[:n] & self.is_hazard[self.kind[:n]])
+        return list(zip(rows.tolist(), self.x[rows].tolist(), self.z[rows].tolist()))
+
+    def remove(self, handles):
+        if handles:
+            self.alive[list(handles)] = False
+            self.dirty = True
+
+    def truncate_after(self, handle):
+        self.alive[handle + 1:self.count] = False
+        self.dirty = True
+
+
+OBSTACLE_STORES = {
+    "lanes": ObstacleLanes,
+    "array": ObstacleArrays,
+}
@@ -0,0 +1,152 @@
+"""Render the game without a window and save the frames as PNGs.
+
+    python offscreen.py --out frames --seconds 10          # a seeded game, no input
+    python offscreen.py --out frames --replay run.rpl      # a recording, frame by frame
+    python offscreen.py --out frames --renderer core --fps 30
+    ffmpeg -framerate 60 -i frames/frame_%06d.png demo.mp4
+
+Frames are drawn into an EGL pbuffer (Mesa's llvmpipe works without a GPU)
+at a fixed frame rate, so a run gives the same images every time: usable
+for visual regression tests and demo videos. GLUT has no window here, so
+its cubes are drawn with plain GL and HUD text is left out.
+"""
+import argparse
+import json
+import os
+import time
+
+from game_state import SPAWNERS
+from replay import Recording
+
+
+def egl_context(width, height):
+    """Make a pbuffer-backed OpenGL context current through EGL; no window or GPU needed."""
+    import ctypes
+    from OpenGL import EGL
+
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(display, None, None):
+        raise RuntimeError("EGL initialisation failed")
+    attrs = (EGL.EGLint * 13)(
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+        EGL.EGL_DEPTH_SIZE, 24,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_NONE,
+    )
+    config = EGL.EGLConfig()
+    count = EGL.EGLint()
+    EGL.eglChooseConfig(display, attrs, ctypes.pointer(config), 1, ctypes.pointer(count))
+    if not count.value:
+        raise RuntimeError("no EGL config with an OpenGL pbuffer")
+    surface = EGL.eglCreatePbufferSurface(
+        display, config, (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE))
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    EGL.eglMakeCurrent(display, surface, surface, context)
+
+
+def gl_cubes():
+    """glutSolidCube / glutWireCube in plain GL, for when GLUT has no window."""
+    from OpenGL.GL import GL_LINES, GL_QUADS, glBegin, glEnd, glNormal3f, glVertex3f
+    from mesh import CUBE_CORNERS, CUBE_EDGES, CUBE_FACES, face_normal
+
+    def solid_cube(size):
+        corners = [(x * size, y * size, z * size) for x, y, z in CUBE_CORNERS]
+        glBegin(GL_QUADS)
+        for face in CUBE_FACES:
+            glNormal3f(*face_normal(*(corners[i] for i in face[:3])))
+            for i in face:
+                glVertex3f(*corners[i])
+        glEnd()
+
+    def wire_cube(size):
+        glBegin(GL_LINES)
+        for edge in CUBE_EDGES:
+            for i in edge:
+                x, y, z = CUBE_CORNERS[i]
+                glVertex3f(x * size, y * size, z * size)
+        glEnd()
+
+    return solid_cube, wire_cube
+
+
+def load_project(renderer="fixed"):
+    """Import Project drawing into an EGL pbuffer the size of its window."""
+    # must be set before OpenGL is first imported
+    os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+    import Project
+    import hud
+    Project.load_gl()
+    Project.RENDERER = renderer
+    egl_context(Project.WINDOW_W, Project.WINDOW_H)
+
+    # GLUT calls need a window: cubes in plain GL, everything else a no-op
+    solid_cube, wire_cube = gl_cubes()
+    stand_ins = {"glutSolidCube": solid_cube, "glutWireCube": wire_cube, "glutBitmapWidth": lambda font, c: 0}
+    for module in (Project, hud):
+        for name, value in list(vars(module).items()):
+            if name.startswith("glut") and callable(value):
+                setattr(module, name, stand_ins.get(name, lambda *args: None))
+    Project.init_gl()
+    return Project
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="frames", help="directory for the PNG frames")
+    parser.add_argument("--replay", metavar="FILE", help="render a recording instead of a new game")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the new game")
+    parser.add_argument("--spawner", choices=SPAWNERS, default="timer", help="obstacle spawner of the new game")
+    parser.add_argument("--seconds", type=float, help="game time to render (default: the recording, or 10)")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--renderer", choices=["fixed", "core"], default="fixed")
+    parser.add_argument("--camera", choices=["third", "first"], default="third")
+    parser.add_argument("--ring", type=int, default=3, help="pixel buffer objects in the readback ring")
+    args = parser.parse_args()
+
+    Project = load_project(args.renderer)
+    from frame_capture import FrameCapture
+    from scheduler import FrameClock
+
+    if args.replay:
+        run = Recording.load(args.replay)
+        Project.start_replay(run)
+        seconds = args.seconds or run.ticks / run.hz
+    else:
+        Project.new_game(args.seed, spawner=args.spawner)
+        seconds = args.seconds or 10.0
+    Project.camera_mode_third = args.camera == "third"
+
+    # every frame is exactly 1 / fps of game time, however long it takes to draw
+    now = [0.0]
+    Project.clock = FrameClock(lambda: now[0])
+    Project.capture = FrameCapture(Project.WINDOW_W, Project.WINDOW_H, args.out, ring=args.ring)
+
+    frames = int(round(seconds * args.fps))
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        now[0] += 1.0 / args.fps
+        Project.idle()
+        Project.showScreen()
+    draw_wall = time.perf_counter() - t0
+    grab_seconds = Project.capture.grab_seconds
+    Project.stop_capture()
+    wall = time.perf_counter() - t0
+
+    print(json.dumps({
+        "frames": frames,
+        "out": args.out,
+        "wall_seconds": round(wall, 3),
+        "frames_per_sec": round(frames / wall, 1) if wall > 0 else None,
+        "draw_seconds": round(draw_wall, 3),
+        "grab_ms_per_frame": round(grab_seconds * 1000.0 / frames, 3) if frames else None,
+        "total_score": Project.state.total_score,
+        "game_over": Project.state.game_over,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import csv
+import time
+from collections import deque
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = int(round(p / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[k]
+
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a ring buffer of recent frames.
+
+    Call start() where timing begins, mark(phase) after each phase (the
+    time since the previous mark is charged to that phase) and
+    end_frame() once per displayed frame.
+    """
+
+    def __init__(self, phases, capacity=600):
+        self.phases = list(phases)
+        self.index = {p: i for i, p in enumerate(self.phases)}
+        self.frames = deque(maxlen=capacity)  # (frame_time, (phase times...))
+        self.current = [0.0] * len(self.phases)
+        self.frame_count = 0
+        self._mark = time.perf_counter()
+        self._last_end = None
+
+    def start(self):
+        self._mark = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[self.index[phase]] += now - self._mark
+        self._mark = now
+
+    def end_frame(self):
+        now = time.perf_counter()
+        frame_time = now - self._last_end if self._last_end is not None else sum(self.current)
+        self._last_end = now
+        self.frames.append((frame_time, tuple(self.current)))
+        self.current = [0.0] * len(self.phases)
+        self.frame_count += 1
+
+    def summary(self):
+        """Frame time percentiles and mean per-phase time, all in ms."""
+        if not self.frames:
+            return {"frames": 0}
+        times = sorted(f[0] for f in self.frames)
+        n = len(self.frames)
+        phase_ms = {}
+        for i, p in enumerate(self.phases):
+            phase_ms[p] = sum(f[1][i] for f in self.frames) * 1000.0 / n
+        return {
+            "frames": n,
+            "p50": percentile(times, 50) * 1000.0,
+            "p95": percentile(times, 95) * 1000.0,
+            "p99": percentile(times, 99) * 1000.0,
+            "work": sum(phase_ms.values()),
+            "phases": phase_ms,
+        }
+
+    def overlay_lines(self):
+        """Text lines for the on-screen overlay."""
+        s = self.summary()
+        if not s["frames"]:
+            return ["Frame: no data"]
+        lines = [
+            "Frame ms  p50 {:.2f}  p95 {:.2f}  p99 {:.2f}  work {:.2f}  ({} frames)".format(
+                s["p50"], s["p95"], s["p99"], s["work"], s["frames"])
+        ]
+        lines.append("  ".join("{} {:.2f}".format(p, ms) for p, ms in s["phases"].items()))
+        return lines
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "frame_ms", "work_ms"] + [p + "_ms" for p in self.phases])
+            first = self.frame_count - len(self.frames)
+            for i, (frame_time, phase_times) in enumerate(self.frames):
+                writer.writerow(
+                    [first + i, "%.4f" % (frame_time * 1000.0), "%.4f" % (sum(phase_times) * 1000.0)]
+                    + ["%.4f" % (t * 1000.0) for t in phase_times]
+                )
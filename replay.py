@@ -0,0 +1,117 @@
+"""Record and replay runs: the RNG seed, the spawner and the actions applied on each tick.
+
+    python Project.py --record run.rpl    # play normally, save the run on exit
+    python Project.py --replay run.rpl    # watch a recording in real time
+    python replay.py run.rpl              # replay without a window, as fast as possible
+
+The simulation only changes through fixed-size ticks, its own seeded RNG
+and tick-stamped actions, so the same file always gives the same run.
+"""
+import argparse
+import json
+import random
+import struct
+import time
+
+from game_state import ACTIONS, SIM_HZ, SPAWNERS, GameState
+from obstacles import OBSTACLE_STORES
+
+
+MAGIC = b"RPLY"
+VERSION = 2
+HEADER = struct.Struct("<4sBqHIB")  # magic, version, seed, tick rate, length in ticks, index into SPAWNERS
+HEADER_V1 = struct.Struct("<4sBqHI")  # without the spawner, always "timer"
+EVENT = struct.Struct("<IB")  # tick, index into ACTIONS
+
+
+class Recording:
+    """A run's seed, tick rate, spawner and tick-stamped input actions.
+
+    An instance is also the FixedStepper.recorder hook: it is called with
+    (tick, inputs) for every tick that had input.
+    """
+
+    def __init__(self, seed=None, hz=SIM_HZ, spawner="timer"):
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.hz = hz
+        self.spawner = spawner
+        self.events = []  # (tick, action) in tick order
+        self.ticks = 0  # length of the run
+
+    def __call__(self, tick, inputs):
+        for action in inputs:
+            self.events.append((tick, action))
+
+    def inputs_by_tick(self):
+        """{tick: [actions]}, the form FixedStepper.playback takes."""
+        by_tick = {}
+        for tick, action in self.events:
+            by_tick.setdefault(tick, []).append(action)
+        return by_tick
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.hz, self.ticks, SPAWNERS.index(self.spawner)))
+            for tick, action in self.events:
+                f.write(EVENT.pack(tick, ACTIONS.index(action)))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version = struct.unpack_from("<4sB", data)
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError("%s is not a replay file" % path)
+        if version == 1:
+            header = HEADER_V1
+            _, _, seed, hz, ticks = header.unpack_from(data)
+            spawner = "timer"
+        else:
+            header = HEADER
+            _, _, seed, hz, ticks, spawner = header.unpack_from(data)
+            spawner = SPAWNERS[spawner]
+        recording = cls(seed, hz, spawner)
+        recording.ticks = ticks
+        recording.events = [(tick, ACTIONS[a]) for tick, a in EVENT.iter_unpack(data[header.size:])]
+        return recording
+
+
+def play(recording, obstacle_store="lanes"):
+    """Run a recording to the end without rendering; returns the final GameState."""
+    state = GameState(recording.seed, obstacle_store, spawner=recording.spawner)
+    dt = 1.0 / recording.hz
+    by_tick = recording.inputs_by_tick()
+    for tick in range(recording.ticks):
+        state.step(dt, by_tick.get(tick, ()))
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file")
+    parser.add_argument("--store", default="lanes", choices=list(OBSTACLE_STORES), help="obstacle store")
+    args = parser.parse_args()
+
+    recording = Recording.load(args.file)
+    t0 = time.perf_counter()
+    state = play(recording, args.store)
+    wall = time.perf_counter() - t0
+
+    print(json.dumps({
+        "ticks": recording.ticks,
+        "inputs": len(recording.events),
+        "spawner": recording.spawner,
+        "sim_seconds": round(recording.ticks / recording.hz, 3),
+        "wall_seconds": round(wall, 3),
+        "ticks_per_sec": round(recording.ticks / wall) if wall > 0 else None,
+        "total_score": state.total_score,
+        "collect_score": state.collect_score,
+        "player_z": round(state.player_z, 3),
+        "game_over": state.game_over,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import ctypes
+
+from OpenGL.GL import *
+
+from instancing import float_array
+from mesh import VERTEX_FLOATS, record_mesh
+
+
+class RoadStreamer:
+    """Ring buffer of pre-built road segments in one VBO.
+
+    Every segment has the same geometry shifted along z, so one template
+    is recorded from draw_road_segment(0) and copied into the slot of a
+    new segment only when the player crosses a segment boundary. The
+    whole road is then one glDrawArrays per run of slots inside the
+    camera frustum.
+    """
+
+    def __init__(self, draw_segment, segment_length, num_segments):
+        self.segment_length = segment_length
+        self.num_segments = num_segments
+        self.template = record_mesh(draw_segment, 0.0).tris
+        self.slot_vertices = len(self.template) // VERTEX_FLOATS
+        self.slot_bytes = len(self.template) * 4
+        self.slot_z = [None] * num_segments  # z_start held by each slot
+        self.segments_built = 0
+
+        # Segment bounds relative to z_start, for culling
+        xs = self.template[0::VERTEX_FLOATS]
+        ys = self.template[1::VERTEX_FLOATS]
+        zs = self.template[2::VERTEX_FLOATS]
+        self.lo = (min(xs), min(ys), min(zs))
+        self.hi = (max(xs), max(ys), max(zs))
+
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.slot_bytes * num_segments, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _build_slot(self, slot, z_start):
+        data = self.template[:]
+        for i in range(2, len(data), VERTEX_FLOATS):
+            data[i] += z_start
+        glBufferSubData(GL_ARRAY_BUFFER, slot * self.slot_bytes, self.slot_bytes, float_array(data))
+        self.slot_z[slot] = z_start
+        self.segments_built += 1
+
+    def update(self, player_z):
+        """Make the slots hold the same segments draw_environment() used to loop over."""
+        first_seg_index = int(player_z // self.segment_length)
+        bound = False
+        for i in range(first_seg_index, first_seg_index + self.num_segments):
+            slot = i % self.num_segments
+            z_start = i * self.segment_length
+            if self.slot_z[slot] != z_start:
+                if not bound:
+                    glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+                    bound = True
+                self._build_slot(slot, z_start)
+        if bound:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def visible_runs(self, player_z, frustum):
+        """(first slot, slot count) ranges holding segments inside the frustum."""
+        first_seg_index = int(player_z // self.segment_length)
+        lo, hi = self.lo, self.hi
+        runs = []
+        for i in range(first_seg_index, first_seg_index + self.num_segments):
+            z_start = i * self.segment_length
+            if not frustum.test_box("segment", (lo[0], lo[1], lo[2] + z_start), (hi[0], hi[1], hi[2] + z_start)):
+                continue
+            slot = i % self.num_segments
+            if runs and runs[-1][0] + runs[-1][1] == slot:
+                runs[-1][1] += 1
+            else:
+                runs.append([slot, 1])
+        return runs
+
+    def draw(self, player_z, frustum=None):
+        self.update(player_z)
+        if frustum is not None:
+            runs = self.visible_runs(player_z, frustum)
+        else:
+            runs = [[0, self.num_segments]]
+
+        stride = VERTEX_FLOATS * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, stride, ctypes.c_void_p(0))
+        glNormalPointer(GL_FLOAT, stride, ctypes.c_void_p(12))
+        glColorPointer(3, GL_FLOAT, stride, ctypes.c_void_p(24))
+
+        for slot, count in runs:
+            glDrawArrays(GL_TRIANGLES, slot * self.slot_vertices, count * self.slot_vertices)
+
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
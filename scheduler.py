@@ -0,0 +1,60 @@
+import time
+
+
+class FrameScheduler:
+    """Frame pacing for timer-driven redraws (glutTimerFunc).
+
+    next_delay() gives the milliseconds until the next frame: 1/fps apart
+    while the game is animating, 1/idle_fps apart on static screens.
+    Deadlines advance by whole intervals so the rate holds on average;
+    after a stall the schedule restarts from now instead of bursting to
+    catch up.
+    """
+
+    def __init__(self, fps=60, idle_fps=4):
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.deadline = None
+
+    def reset(self):
+        self.deadline = None
+
+    def next_delay(self, now, active=True):
+        interval = 1.0 / (self.fps if active else self.idle_fps)
+        if self.deadline is None:
+            self.deadline = now
+        self.deadline += interval
+        if self.deadline < now:
+            self.deadline = now
+        elif self.deadline > now + interval:  # just switched to the faster rate
+            self.deadline = now + interval
+        return int(round((self.deadline - now) * 1000.0))
+
+
+class FrameClock:
+    """Game time sampled once per frame from a monotonic timer.
+
+    tick() reads the timer and advances now by dt, the real time since the
+    previous tick times scale (below 1 for slow motion, above 1 to fast
+    forward). While paused, dt is 0 and now stands still. Everything drawn
+    or simulated in a frame uses this one sample.
+    """
+
+    def __init__(self, timer=time.perf_counter, scale=1.0):
+        self.timer = timer
+        self.scale = scale
+        self.paused = False
+        self.now = 0.0
+        self.dt = 0.0
+        self._last = timer()
+
+    def tick(self):
+        real = self.timer()
+        self.dt = 0.0 if self.paused else (real - self._last) * self.scale
+        self._last = real
+        self.now += self.dt
+        return self.dt
+
+    def resync(self):
+        """Don't count the real time since the last tick (after a stall)."""
+        self._last = self.timer()
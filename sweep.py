@@ -0,0 +1,151 @@
+"""Difficulty sweep: headless bot games for many settings over a process pool.
+
+    python sweep.py --samples 64                        # random search over SPACE
+    python sweep.py --grid max_base_speed=16,20,24 --grid cube_chance=0.08,0.12
+    python sweep.py --samples 32 --policy random --games 1024 --out random.json
+
+Every setting runs --games games at once in a batch_sim.BatchSim until all
+have crashed or --seconds of game time have passed. Settings are
+independent tasks, so the sweep scales with the number of worker
+processes. All results go into one JSON file.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from batch_sim import BATCH_ACTIONS, BatchSim, dodge_actions
+from game_state import SIM_HZ, Difficulty
+
+try:
+    import numpy as np
+except ImportError:  # batch_sim reports the missing dependency
+    np = None
+
+
+# Random search range per Difficulty setting
+SPACE = {
+    "speed_ramp_per_sec": (0.0, 0.1),
+    "speed_ramp_per_100_points": (0.0, 1.0),
+    "max_base_speed": (12.0, 30.0),
+    "spawn_interval_start": (0.6, 1.4),
+    "spawn_interval_decay": (0.0, 0.05),
+    "spawn_interval_min": (0.2, 0.6),
+    "cube_chance": (0.0, 0.25),
+    "shield_chance": (0.0, 0.1),
+}
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def summarize(values):
+    result = {"mean": round(float(np.mean(values)), 3)}
+    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        result["p%d" % p] = round(float(v), 3)
+    result["values"] = [round(float(v), 3) for v in values]
+    return result
+
+
+def run_setting(task):
+    """One sweep point; runs in a worker process."""
+    index, params, games, seconds, seed, policy, reaction = task
+    sim = BatchSim(games, seed=seed, difficulty=Difficulty(**params))
+    rng = np.random.default_rng(seed + 1)
+    survival = np.full(games, float(seconds))
+    scores = np.zeros(games, dtype=np.int64)
+    running = np.ones(games, dtype=bool)
+
+    t0 = time.perf_counter()
+    ticks = 0
+    for ticks in range(1, int(seconds * SIM_HZ) + 1):
+        if policy == "bot":
+            actions = dodge_actions(sim, reaction=reaction, rng=rng)
+        else:
+            actions = rng.choice(len(BATCH_ACTIONS), size=games, p=[0.9, 0.03, 0.03, 0.02, 0.02])
+        done, total = sim.step(actions)
+        ended = running & done
+        if ended.any():
+            survival[ended] = ticks / SIM_HZ
+            scores[ended] = total[ended]
+            running &= ~done
+            if not running.any():
+                break
+    scores[running] = sim.total_score[running]
+
+    return {
+        "index": index,
+        "params": Difficulty(**params).as_dict(),
+        "survived": int(running.sum()),
+        "survival_seconds": summarize(survival),
+        "score": summarize(scores),
+        "game_ticks": ticks * games,
+        "cpu_seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def grid_settings(grid):
+    """--grid name=v1,v2 options -> list of params dicts (cartesian product)."""
+    axes = []
+    for option in grid:
+        name, _, values = option.partition("=")
+        if name not in Difficulty.NAMES:
+            raise SystemExit("unknown setting %r; choose from %s" % (name, ", ".join(Difficulty.NAMES)))
+        axes.append([(name, float(v)) for v in values.split(",")])
+    return [dict(combo) for combo in itertools.product(*axes)]
+
+
+def random_settings(samples, seed):
+    rng = np.random.default_rng(seed)
+    return [{name: round(float(rng.uniform(lo, hi)), 4) for name, (lo, hi) in SPACE.items()}
+            for _ in range(samples)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2",
+                        help="grid axis over a Difficulty setting (repeatable)")
+    parser.add_argument("--samples", type=int, default=32, help="random settings when no --grid")
+    parser.add_argument("--games", type=int, default=256, help="games per setting")
+    parser.add_argument("--seconds", type=float, default=300.0, help="game time cap per setting")
+    parser.add_argument("--policy", choices=["bot", "random"], default="bot")
+    parser.add_argument("--reaction", type=float, default=0.05, help="bot's chance per tick to react")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="sweep.json")
+    args = parser.parse_args()
+
+    settings = grid_settings(args.grid) if args.grid else random_settings(args.samples, args.seed)
+    # Same seed for every setting, so they are compared on the same random draws
+    tasks = [(i, params, args.games, args.seconds, args.seed, args.policy, args.reaction)
+             for i, params in enumerate(settings)]
+
+    t0 = time.perf_counter()
+    results = []
+    with Pool(args.workers) as pool:
+        for result in pool.imap_unordered(run_setting, tasks):
+            results.append(result)
+            print("%d/%d  setting %d  median survival %.1fs" % (
+                len(results), len(tasks), result["index"], result["survival_seconds"]["p50"]), file=sys.stderr)
+    wall = time.perf_counter() - t0
+    results.sort(key=lambda r: r["index"])
+
+    report = {
+        "policy": args.policy,
+        "reaction": args.reaction,
+        "games": args.games,
+        "seconds": args.seconds,
+        "workers": args.workers,
+        "wall_seconds": round(wall, 3),
+        "game_ticks_per_sec": round(sum(r["game_ticks"] for r in results) / wall),
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+    print("%d settings in %.1fs -> %s" % (len(results), wall, args.out), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from game_state import NUM_LANES, SIM_HZ, GameState, pickup_chances
+
+np = pytest.importorskip("numpy")
+from batch_sim import BATCH_ACTIONS, BatchSim, dodge_actions  # noqa: E402
+
+
+class MatchedBatchSim(BatchSim):
+    """Draws each game's spawns from the same random.Random stream a
+    GameState with that seed uses, so the two can be compared step by step."""
+
+    def __init__(self, seeds, **kwargs):
+        self.game_rngs = [random.Random(seed) for seed in seeds]
+        super().__init__(len(seeds), **kwargs)
+
+    def draw_spawns(self, rows):
+        _, shield_below = pickup_chances(self.difficulty)
+        lanes, roll, pick = [], [], []
+        for row in rows:
+            rng = self.game_rngs[row]
+            lanes.append(rng.randint(0, NUM_LANES - 1))
+            roll.append(rng.random())
+            # GameState only draws car or barrier when the roll isn't a pickup
+            pick.append(roll[-1] >= shield_below and rng.choice(["car", "barrier"]) == "barrier")
+        return np.array(lanes), np.array(roll), np.array(pick)
+
+
+def test_batch_matches_game_state():
+    """Same spawns and actions: same score, distance and crash tick in every game."""
+    seeds = list(range(8))
+    batch = MatchedBatchSim(seeds)
+    games = [GameState(seed) for seed in seeds]
+    crash_tick = [None] * len(seeds)
+    bot_rng = np.random.default_rng(1)
+
+    for tick in range(120 * SIM_HZ):
+        actions = dodge_actions(batch, reaction=0.05, rng=bot_rng)  # a sloppy bot: crashes take a while
+        done, total = batch.step(actions)
+        for i, state in enumerate(games):
+            action = BATCH_ACTIONS[actions[i]]
+            state.step(1.0 / SIM_HZ, [] if action == "none" else [action])
+            assert state.game_over == done[i]
+            assert state.total_score == total[i]
+            assert state.player_z == pytest.approx(batch.z[i])
+            if state.game_over and crash_tick[i] is None:
+                crash_tick[i] = tick
+        if None not in crash_tick:
+            break
+
+    assert None not in crash_tick
+    assert sum(state.collect_score for state in games) > 0
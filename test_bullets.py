@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from benchmarks import naive_bullet_hits
+from entities import Bullet
+from game_state import BULLET_BUCKET, BULLET_BUCKET_X, BULLET_HIT_X, BULLET_HIT_Z, LANE_XS, bullet_hits
+
+
+def bullet(x, z):
+    b = Bullet()
+    b.x, b.z = x, z
+    return b
+
+
+def random_scene(rng, num_bullets, num_obstacles):
+    """Bullets and obstacles around the lanes, many of them on bucket or hit box edges."""
+    bullets = []
+    for _ in range(num_bullets):
+        x = rng.choice(LANE_XS) + rng.choice([0, BULLET_HIT_X, -BULLET_HIT_X, rng.uniform(-90, 90)])
+        z = rng.choice([rng.randrange(-3, 15) * BULLET_BUCKET + rng.choice([0, BULLET_HIT_Z, -BULLET_HIT_Z]),
+                        rng.uniform(-200, 1200)])
+        bullets.append(bullet(x, z))
+    hazards = []
+    for i in range(num_obstacles):
+        near = rng.choice(bullets)
+        x, z = rng.choice([
+            (rng.choice(LANE_XS), rng.uniform(-200, 1200)),
+            (rng.uniform(LANE_XS[0] - 60, LANE_XS[-1] + 60), rng.uniform(-200, 1200)),  # between lanes
+            (rng.randrange(-4, 4) * BULLET_BUCKET_X, rng.randrange(-3, 15) * BULLET_BUCKET),
+            (near.x + rng.uniform(-40, 40), near.z + rng.uniform(-50, 50)),  # close to a bullet
+        ])
+        hazards.append(("obstacle %d" % i, x, z))
+    return bullets, hazards
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bullet_hits_matches_naive_loop(seed):
+    rng = random.Random(seed)
+    bullets, hazards = random_scene(rng, rng.randrange(1, 60), rng.randrange(1, 80))
+    hit_bullets, hit_obstacles = bullet_hits(bullets, hazards)
+    naive_bullets, naive_obstacles = naive_bullet_hits(bullets, hazards)
+    assert hit_bullets == {id(b) for b in naive_bullets}
+    assert set(hit_obstacles) == set(naive_obstacles)
+    assert len(hit_obstacles) == len(set(hit_obstacles))
+    assert naive_obstacles  # the scenes are dense enough to hit something
+
+
+def test_bullet_hits_edges():
+    lane = LANE_XS[1]
+    hazards = [("a", lane, BULLET_BUCKET), ("b", lane + 45, 0.0)]
+    just_in = bullet(lane, BULLET_BUCKET - BULLET_HIT_Z + 0.01)  # in the bucket below "a"
+    just_out = bullet(lane + BULLET_HIT_X, BULLET_BUCKET)  # |dx| == hit box: a miss
+    between = bullet(lane + 20, 0.0)  # reaches "b", which sits between two lanes
+    hit_bullets, hit_obstacles = bullet_hits([just_in, just_out, between], hazards)
+    assert hit_bullets == {id(just_in), id(between)}
+    assert hit_obstacles == ["a", "b"]
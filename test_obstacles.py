@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+from game_state import LANE_XS, NUM_LANES
+from obstacles import OBSTACLE_STORES
+
+
+@pytest.mark.parametrize("store", sorted(OBSTACLE_STORES))
+def test_truncate_after_out_of_z_order(store):
+    """Adds in random z order, as benchmarks.drive_dense does: truncate_after
+    keeps exactly what was added up to the handle, wherever it sits in a lane."""
+    if store == "array":
+        pytest.importorskip("numpy")
+    obstacles = OBSTACLE_STORES[store](LANE_XS)
+    rng = random.Random(4)
+    added = [(rng.randrange(NUM_LANES), float(z), rng.choice(["car", "barrier"]))
+             for z in rng.sample(range(0, 2000, 10), 60)]  # unique z, in random order
+    for lane, z, kind in added:
+        obstacles.add(lane, z, kind)
+
+    middle = added[len(added) // 2][1]
+    (handle,) = [o for o, x, z in obstacles.hazards() if z == middle]
+    kept = added[:len(added) // 2 + 1]
+
+    obstacles.truncate_after(handle)
+    obstacles.despawn_behind(-1.0)  # the array store compacts removed rows here
+    assert len(obstacles) == len(kept)
+    assert sorted((lane, float(z), kind) for lane, z, kind in obstacles.items()) == sorted(kept)
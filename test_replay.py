@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from game_state import SPAWNERS, FixedStepper, GameState
+from replay import Recording, play
+
+
+@pytest.mark.parametrize("spawner", SPAWNERS)
+def test_recording_round_trip(tmp_path, spawner):
+    """A run fed uneven frame times replays to the same state from the saved file."""
+    recording = Recording(seed=11, spawner=spawner)
+    state = GameState(recording.seed, spawner=spawner)
+    stepper = FixedStepper(state, recording.hz)
+    stepper.recorder = recording
+
+    rng = random.Random(3)
+    for frame in range(3000):
+        if frame % 25 == 0:
+            stepper.pending.append(rng.choice(["left", "right", "boost", "brake"]))
+        if frame == 400:
+            stepper.pending.append("cheat")
+        if state.game_over:
+            stepper.pending.append("restart")
+        stepper.advance(rng.uniform(0.004, 0.03))
+    recording.ticks = stepper.ticks
+
+    path = tmp_path / "run.rpl"
+    recording.save(str(path))
+    loaded = Recording.load(str(path))
+    assert (loaded.seed, loaded.hz, loaded.spawner, loaded.ticks) == (11, recording.hz, spawner, stepper.ticks)
+    assert loaded.events == recording.events
+
+    replayed = play(loaded)
+    assert (replayed.total_score, replayed.collect_score, replayed.game_over) == \
+        (state.total_score, state.collect_score, state.game_over)
+    assert replayed.player_z == state.player_z
+    assert replayed.obstacles.items() == state.obstacles.items()
@@ -0,0 +1,31 @@
+import pytest
+
+from game_state import SIM_HZ, FixedStepper, GameState
+from scheduler import FrameClock
+
+
+@pytest.mark.parametrize("fps", [60, 30])
+@pytest.mark.parametrize("scale", [0.25, 1.0, 16.0])
+def test_time_scale_advances_simulation(fps, scale):
+    """N frames at scale s run s * N / fps seconds of game time, even when
+    one scaled frame is longer than the stepper's max_frame_time."""
+    now = [0.0]
+    clock = FrameClock(lambda: now[0], scale)
+    state = GameState(seed=1)
+    stepper = FixedStepper(state, SIM_HZ)
+    state.apply_input("pause")  # only the clock matters here
+    frames = 120
+    for _ in range(frames):
+        now[0] += 1.0 / fps
+        stepper.advance(clock.tick(), clock.scale)
+    assert state.elapsed == pytest.approx(scale * frames / fps, abs=2.0 / SIM_HZ)
+
+
+def test_stall_is_clamped_in_real_time():
+    now = [0.0]
+    clock = FrameClock(lambda: now[0], 4.0)
+    state = GameState(seed=1)
+    stepper = FixedStepper(state, SIM_HZ)
+    now[0] += 10.0  # the window was dragged, say
+    stepper.advance(clock.tick(), clock.scale)
+    assert state.elapsed == pytest.approx(4.0 * stepper.max_frame_time, abs=2.0 / SIM_HZ)
@@ -0,0 +1,52 @@
+import pytest
+
+from game_state import SPAWN_AHEAD, SPAWN_SPACING, GameState
+from track import TrackGenerator
+
+
+def test_threaded_generator_matches_unthreaded():
+    threaded = TrackGenerator(seed=5, threaded=True)
+    try:
+        chunks = [threaded.chunk(i) for i in range(8)]
+    finally:
+        threaded.close()
+    plain = TrackGenerator(seed=5)
+    assert chunks == [plain.chunk(i) for i in range(8)]
+
+
+def test_track_is_reproducible_from_the_seed():
+    a, b, other = TrackGenerator(seed=9), TrackGenerator(seed=9), TrackGenerator(seed=10)
+    assert [a.chunk(i) for i in range(4)] == [b.chunk(i) for i in range(4)]
+    assert a.chunk(0) != other.chunk(0)
+    marks = [mark for i in range(4) for mark, _, _ in a.chunk(i)]
+    assert min(later - earlier for earlier, later in zip(marks, marks[1:])) == pytest.approx(SPAWN_SPACING / 2)
+
+
+def released(hz, seconds=20.0):
+    """(meeting distance, lane, kind) of every obstacle a track game releases."""
+    state = GameState(seed=3, spawner="track")
+    out = []
+    add = state.obstacles.add
+
+    def record(lane, z, kind):
+        out.append(((z + state.player_z) / 2.0, lane, kind))  # where the player meets it
+        add(lane, z, kind)
+
+    state.obstacles.add = record
+    state.step(1.0 / hz, ["cheat"])  # the gun keeps the run going
+    for _ in range(int(seconds * hz)):
+        state.step(1.0 / hz)
+    return out
+
+
+def test_track_does_not_depend_on_tick_rate():
+    slow, fast = released(60), released(240)
+    count = min(len(slow), len(fast))
+    assert count > 20
+    for (meet_a, lane_a, kind_a), (meet_b, lane_b, kind_b) in zip(slow[:count], fast[:count]):
+        assert (lane_a, kind_a) == (lane_b, kind_b)
+        assert meet_a == pytest.approx(meet_b)
+
+    track = TrackGenerator(seed=3)
+    mark, lane, kind = track.chunk(0)[0]
+    assert slow[0] == (pytest.approx(mark + SPAWN_AHEAD / 2), lane, kind)
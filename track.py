@@ -0,0 +1,113 @@
+"""Seeded track generator: the obstacles of a whole run, laid out ahead of time.
+
+The track is a list of marks, one per obstacle, each a player distance
+with a lane and a kind. GameState(spawner="track") releases an obstacle
+once the player has driven past its mark, so spawning is one comparison
+per tick instead of a timer plus a scan of the obstacles, and the same
+seed always gives the same track.
+
+Marks are generated a chunk (CHUNK_LENGTH of player distance) at a time,
+either on demand or on a background thread that stays lookahead chunks
+ahead of the player. Without the thread a chunk is generated each time
+the player enters a new one, which is one slower tick every few seconds.
+"""
+import random
+import threading
+
+from game_state import NUM_LANES, SPAWN_SPACING, Difficulty, base_speed, roll_kind, spawn_interval
+
+
+CHUNK_LENGTH = 6000  # ten road segments
+
+
+class TrackGenerator:
+    """Chunks of (mark, lane, kind), sorted by mark, from a seed.
+
+    Gaps between marks follow the same difficulty curve as the timer
+    spawner: the spawn interval times the speed the player would have at
+    that point without boosting or pickups, and never less than half of
+    SPAWN_SPACING (obstacles close in at twice the player's speed). Lane
+    and kind are drawn like GameState.spawn_obstacle() draws them, with the
+    same game_state helpers.
+    Generated chunks are kept, so a restart replays the same track.
+    """
+
+    def __init__(self, seed=None, difficulty=None, chunk_length=CHUNK_LENGTH, lookahead=2, threaded=False):
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.difficulty = difficulty or Difficulty()
+        self.chunk_length = chunk_length
+        self.lookahead = lookahead
+        self.chunks = []
+        self.wanted = lookahead  # chunks to have ready
+
+        # Generation state, only touched by whoever generates (caller or worker)
+        self.rng = random.Random(seed)
+        self.elapsed = 0.0  # expected game time at next_mark
+        self.interval = 0.8  # GameState's first spawn interval
+        self.next_mark = 0.0
+        self.next_mark = self._gap()
+
+        self.ready = threading.Condition()
+        self.closed = False
+        self.worker = None
+        if threaded:
+            self.worker = threading.Thread(target=self._run, daemon=True)
+            self.worker.start()
+        else:
+            for index in range(lookahead):
+                self.chunks.append(self._make_chunk(index))
+
+    def _gap(self):
+        """Player distance to the next mark; advances the expected time."""
+        distance_score = self.next_mark / 35.0
+        speed = base_speed(self.elapsed, distance_score, self.difficulty) * 60
+        gap = max(speed * self.interval, SPAWN_SPACING / 2)
+        self.elapsed += gap / speed
+        self.interval = spawn_interval(self.elapsed, self.difficulty)
+        return gap
+
+    def _make_chunk(self, index):
+        rng = self.rng
+        end = (index + 1) * self.chunk_length
+        chunk = []
+        while self.next_mark < end:
+            lane = rng.randint(0, NUM_LANES - 1)
+            chunk.append((self.next_mark, lane, roll_kind(rng, self.difficulty)))
+            self.next_mark += self._gap()
+        return chunk
+
+    def _run(self):
+        while True:
+            with self.ready:
+                while len(self.chunks) >= self.wanted and not self.closed:
+                    self.ready.wait()
+                if self.closed:
+                    return
+                index = len(self.chunks)
+            chunk = self._make_chunk(index)
+            with self.ready:
+                self.chunks.append(chunk)
+                self.ready.notify_all()
+
+    def chunk(self, index):
+        """The marks of chunk index; also asks for the lookahead chunks after it."""
+        if index < len(self.chunks) - self.lookahead:
+            return self.chunks[index]  # list reads and appends are atomic
+        with self.ready:
+            self.wanted = max(self.wanted, index + 1 + self.lookahead)
+            if self.worker is None:
+                while len(self.chunks) < self.wanted:
+                    self.chunks.append(self._make_chunk(len(self.chunks)))
+            else:
+                self.ready.notify_all()
+                while len(self.chunks) <= index:
+                    self.ready.wait()
+            return self.chunks[index]
+
+    def close(self):
+        """Stop the worker thread."""
+        with self.ready:
+            self.closed = True
+            self.ready.notify_all()